@@ -0,0 +1,104 @@
+'''
+Measures the time to convert documentation strings from reStructuredText to HTML.
+
+The docstrings of all modules, classes, and functions in the standard library's Python source are
+converted both by rstToHtml and by the previous approach of calling docutils.core.publish_string for
+each docstring. The time per docstring is reported for each, along with the share of docstrings
+that take the fast path for plain text, and any docstrings for which the HTML differs.
+
+Usage: python benchmarks/docRendering.py [maxDocCount]
+'''
+
+# External imports:
+import ast
+import docutils.core
+import os
+import re
+import statistics
+import sys
+import sysconfig
+import time
+
+# Local imports:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import rstToHtml
+
+def findDocs() -> list:
+    '''Returns the docstrings found in the standard library's Python source files.'''
+    docs = []
+    for directory, subdirectories, filenames in os.walk(sysconfig.get_paths()['stdlib']):
+        subdirectories[:] = sorted(name for name in subdirectories if name != 'site-packages')
+        for filename in sorted(filenames):
+            if not filename.endswith('.py'):
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding = 'utf-8') as file:
+                    tree = ast.parse(file.read())
+            except:
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                    doc = ast.get_docstring(node)
+                    if doc:
+                        docs.append(doc)
+    return docs
+
+def publishString(rstText: str, defaultRole: str = 'code') -> str:
+    '''Converts a docstring the way rstToHtml did before its docutils publisher was reused.'''
+    settings = {
+        'template': f'{os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}/templates/rstToHtml.txt',
+        'output_encoding': 'unicode',
+        'report_level': 3,
+        'halt_level': 3,
+        'traceback': True,
+    }
+    modifiedRstText = f'.. default-role:: {defaultRole}\n{rstText}'
+    html = docutils.core.publish_string(modifiedRstText, writer_name = 'html', settings_overrides = settings)
+    asteriskRegEx = '<a href=".*"><span class="problematic" id=".*">\\*</span></a>'
+    return re.sub(asteriskRegEx, '*', html)
+
+def timeConversion(convert, doc: str) -> tuple:
+    '''Returns the time taken to convert a docstring, and the HTML (or the type of exception).'''
+    startTime = time.perf_counter()
+    try:
+        html = convert(doc)
+    except Exception as exception:
+        html = type(exception)
+    return time.perf_counter() - startTime, html
+
+def printTimes(label: str, times: list) -> None:
+    if len(times):
+        print(f'{label:<28} {len(times):>7} {statistics.mean(times) * 1e3:>10.3f} '
+            f'{statistics.median(times) * 1e3:>10.3f} {sum(times):>10.2f}')
+
+def main() -> None:
+    docs = findDocs()
+    if len(sys.argv) > 1:
+        maxDocCount = int(sys.argv[1])
+        docs = docs[::max(1, len(docs) // maxDocCount)][:maxDocCount]
+
+    renderer = rstToHtml.RstRenderer()
+    oldTimes, newTimes, plainTimes, otherTimes = [], [], [], []
+    mismatches = []
+    for doc in docs:
+        oldTime, oldHtml = timeConversion(publishString, doc)
+        newTime, newHtml = timeConversion(rstToHtml.rstToHtml, doc)
+        oldTimes.append(oldTime)
+        newTimes.append(newTime)
+        (plainTimes if renderer.isPlainText(doc) else otherTimes).append(newTime)
+        if newHtml != oldHtml:
+            mismatches.append((doc, oldHtml, newHtml))
+
+    print(f'{"":<28} {"docs":>7} {"mean ms":>10} {"median ms":>10} {"total s":>10}')
+    printTimes('publish_string', oldTimes)
+    printTimes('rstToHtml', newTimes)
+    printTimes('rstToHtml (plain text)', plainTimes)
+    printTimes('rstToHtml (docutils)', otherTimes)
+    print(f'Plain text fast path: {len(plainTimes) / len(docs):.1%} of docstrings')
+    print(f'Speedup: {sum(oldTimes) / sum(newTimes):.2f}x')
+    print(f'Docstrings with different HTML: {len(mismatches)}')
+    for doc, oldHtml, newHtml in mismatches[:5]:
+        print(f'\n{doc!r}\n  publish_string: {oldHtml!r}\n  rstToHtml:      {newHtml!r}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+'''
+Measures the throughput of PythonSyntaxHighlighter, and checks that its output hasn't changed.
+
+The largest Python files in the standard library are highlighted, and the number of lines
+highlighted per second is reported for each. Then src/sampleCode.py, which exercises every kind of
+token the highlighter recognizes, is highlighted in both themes and compared with the formats saved
+in sampleCodeFormats.json, reporting any lines that differ. After an intentional change to the
+highlighting, run with --save to save the new formats.
+
+Usage: python benchmarks/highlighting.py [--save] [fileCount]
+'''
+
+# External imports:
+import json
+import os
+import sys
+import sysconfig
+import time
+from PyQt5.QtGui import QGuiApplication, QTextDocument
+
+# Local imports:
+sourceDirectory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, sourceDirectory)
+from PythonSyntaxHighlighter import PythonSyntaxHighlighter, Theme
+
+formatsFilename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sampleCodeFormats.json')
+
+def findLargestFiles(fileCount: int) -> list:
+    '''Returns the paths of the largest Python files in the standard library.'''
+    paths = []
+    for directory, subdirectories, filenames in os.walk(sysconfig.get_paths()['stdlib']):
+        subdirectories[:] = [name for name in subdirectories if name != 'site-packages']
+        paths += [os.path.join(directory, name) for name in filenames if name.endswith('.py')]
+    return sorted(paths, key = os.path.getsize, reverse = True)[:fileCount]
+
+def highlight(text: str, theme: Theme) -> tuple:
+    '''Highlights text, returning the document and the time taken to highlight it.'''
+    document = QTextDocument()
+    document.setPlainText(text)
+    # Attach the highlighter after setting the theme, so that the time is for a single pass.
+    highlighter = PythonSyntaxHighlighter(None)
+    highlighter.setParent(document)
+    highlighter.theme = theme
+    startTime = time.perf_counter()
+    highlighter.setDocument(document)
+    highlighter.rehighlight()
+    return document, time.perf_counter() - startTime
+
+def getFormats(document: QTextDocument) -> list:
+    '''Returns the formats applied to each line of a document, as lists of the start, length,
+    color, and whether the text is bold and italic.'''
+    formats = []
+    block = document.begin()
+    while block.isValid():
+        formats.append([[formatRange.start, formatRange.length,
+            formatRange.format.foreground().color().name(),
+            formatRange.format.fontWeight() > 50, formatRange.format.fontItalic()]
+            for formatRange in block.layout().formats()])
+        block = block.next()
+    return formats
+
+def main() -> None:
+    arguments = [argument for argument in sys.argv[1:] if argument != '--save']
+    save = '--save' in sys.argv
+    fileCount = int(arguments[0]) if len(arguments) else 5
+    app = QGuiApplication([])
+
+    # Measure throughput.
+    print(f'{"file":<40} {"lines":>8} {"seconds":>10} {"lines/s":>10}')
+    totalLineCount = 0
+    totalSeconds = 0
+    for path in findLargestFiles(fileCount):
+        with open(path, encoding = 'utf-8', errors = 'replace') as file:
+            text = file.read()
+        document, seconds = highlight(text, Theme.LIGHT)
+        lineCount = document.blockCount()
+        totalLineCount += lineCount
+        totalSeconds += seconds
+        name = os.path.relpath(path, sysconfig.get_paths()['stdlib'])
+        print(f'{name:<40} {lineCount:>8} {seconds:>10.3f} {lineCount / seconds:>10.0f}')
+    print(f'{"total":<40} {totalLineCount:>8} {totalSeconds:>10.3f} {totalLineCount / totalSeconds:>10.0f}')
+
+    # Check the formats applied to the sample code.
+    with open(os.path.join(sourceDirectory, 'sampleCode.py'), encoding = 'utf-8') as file:
+        text = file.read()
+    formats = {theme.name: getFormats(highlight(text, theme)[0]) for theme in Theme}
+    if save:
+        with open(formatsFilename, 'w') as file:
+            json.dump(formats, file, indent = 1)
+        print(f'Saved formats to {formatsFilename}')
+        return
+    with open(formatsFilename) as file:
+        expectedFormats = json.load(file)
+    lines = text.splitlines()
+    differenceCount = 0
+    for themeName, themeFormats in formats.items():
+        for lineNumber, (lineFormats, expectedLineFormats) in enumerate(
+            zip(themeFormats, expectedFormats[themeName]), 1):
+            if lineFormats != expectedLineFormats:
+                differenceCount += 1
+                if differenceCount <= 5:
+                    print(f'{themeName} line {lineNumber}: {lines[lineNumber - 1]!r}\n'
+                        f'  expected {expectedLineFormats}\n  actual   {lineFormats}')
+    print(f'Sample code lines with different formats: {differenceCount}')
+
+if __name__ == '__main__':
+    main()
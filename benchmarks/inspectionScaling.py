@@ -0,0 +1,57 @@
+'''
+Measures how the time to inspect a class grows with its number of members.
+
+Synthetic classes with increasing numbers of attributes (up to 20,000) are inspected, and the time
+per member is reported for each size. The time per member should stay roughly constant; if it grows
+in proportion to the size, inspection has become quadratic.
+
+Usage: python benchmarks/inspectionScaling.py [maxMemberCount]
+'''
+
+# External imports:
+import os
+import sys
+import time
+
+# Local imports:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+import inspection
+from inspection import MemberData
+
+def createClass(memberCount: int) -> type:
+    '''Creates a class with the given number of attributes, half of them data and half methods.'''
+    members = {}
+    for i in range(memberCount):
+        if i % 2:
+            members[f'method{i}'] = lambda self: None
+        else:
+            members[f'attribute{i}'] = i
+    return type(f'Synthetic{memberCount}', (), members)
+
+def timeInspection(cls: type, repeatCount: int = 3) -> float:
+    '''Returns the shortest time taken to inspect a class.'''
+    times = []
+    for _ in range(repeatCount):
+        classData = MemberData(cls.__name__, cls.__name__, 'class', cls)
+        startTime = time.perf_counter()
+        inspection.inspectObject(classData, cls)
+        times.append(time.perf_counter() - startTime)
+    return min(times)
+
+def main() -> None:
+    maxMemberCount = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    memberCounts = [maxMemberCount // 8, maxMemberCount // 4, maxMemberCount // 2, maxMemberCount]
+
+    print(f'{"members":>10} {"seconds":>10} {"us/member":>10}')
+    timesPerMember = []
+    for memberCount in memberCounts:
+        seconds = timeInspection(createClass(memberCount))
+        timesPerMember.append(seconds / memberCount)
+        print(f'{memberCount:>10} {seconds:>10.4f} {timesPerMember[-1] * 1e6:>10.2f}')
+
+    # Linear scaling keeps the time per member about the same from the smallest to largest class.
+    print(f'Growth in time per member: {timesPerMember[-1] / timesPerMember[0]:.2f}x '
+        f'for {memberCounts[-1] // memberCounts[0]}x as many members')
+
+if __name__ == '__main__':
+    main()
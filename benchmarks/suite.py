@@ -0,0 +1,275 @@
+'''
+Measures the time and memory taken by pyspector's most performance-sensitive operations.
+
+Each benchmark is run once to warm up, then a number of times (5 by default) to measure the median,
+minimum, and maximum times, and once more with tracemalloc tracing to measure the peak memory
+allocated by Python (which doesn't include memory allocated by Qt). The benchmarks run without a
+display, on Qt's offscreen platform unless QT_QPA_PLATFORM specifies another. Output printed while
+benchmarks run (such as docutils' warnings) is discarded, and a table of the results is printed.
+
+The results can be saved to a JSON file with --output, and compared with results saved earlier with
+--compare, which adds the ratio of each median time to the earlier one. Specify the names of
+benchmarks to run just those.
+
+Usage: python benchmarks/suite.py [--repeat count] [--output file] [--compare file] [name ...]
+'''
+
+# External imports:
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, QEventLoop
+from PyQt5.QtWidgets import QApplication, QCheckBox
+
+# Local imports:
+sourceDirectory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, sourceDirectory)
+from Config import Config
+from docRendering import findDocs
+from highlighting import findLargestFiles, highlight
+import inspection
+from inspection import MemberData
+from MainModel import MainModel
+from MainWindow import MainWindow
+from ModuleSelectionModel import ModuleSelectionModel
+from PythonSyntaxHighlighter import Theme
+from rstToHtml import rstToHtml
+import utilities
+
+# Increment this when the format of the results changes.
+resultsVersion = 1
+
+# The modules loaded into the tree, the classes inspected, and the names searched for.
+moduleNames = ['argparse', 'collections', 'decimal', 'email.message', 'json', 'logging', 'pathlib',
+    'typing', 'unittest']
+classNames = ['argparse.ArgumentParser', 'decimal.Decimal', 'email.message.EmailMessage',
+    'logging.Logger', 'pathlib.Path', 'unittest.TestCase']
+searchNames = ['ArgumentParser', 'OrderedDict', 'quantize', 'dumps', 'getLogger', 'PurePath',
+    'assertEqual', 'with_suffix', 'NoSuchName']
+
+# The number of docstrings converted, and the number of source files highlighted.
+docCount = 1000
+sourceFileCount = 5
+
+# A benchmark is set up by a function returning a function to run, and optionally a function to
+# call (without being timed) before each run. A function to run may return the time to report, if
+# only part of it should be timed.
+Benchmark = Callable[[], tuple]
+
+def loadModules(model: MainModel, moduleNames: list) -> None:
+    '''Sets the modules in a model, waiting until they have been loaded.'''
+    eventLoop = QEventLoop()
+    def moduleLoadingFinished(moduleName: str) -> None:
+        if len(model.loadingModuleNames) == 0:
+            eventLoop.quit()
+    model.moduleLoadingFinished.connect(moduleLoadingFinished)
+    model.setModuleNames(moduleNames)
+    if len(model.loadingModuleNames):
+        eventLoop.exec_()
+    model.moduleLoadingFinished.disconnect(moduleLoadingFinished)
+
+def resolveName(name: str) -> object:
+    '''Returns the object with a fully qualified name, importing its module.'''
+    moduleName, _, attributeName = name.rpartition('.')
+    return getattr(importlib.import_module(moduleName), attributeName)
+
+def setUpSetModuleNames() -> tuple:
+    '''Loads the modules into an empty model (without a cache).'''
+    model = MainModel()
+    return lambda: loadModules(model, moduleNames), lambda: loadModules(model, [])
+
+def setUpInspectObject() -> tuple:
+    '''Inspects large classes (and the classes nested within them).'''
+    classes = [resolveName(name) for name in classNames]
+    def run() -> None:
+        for cls in classes:
+            inspection.inspectObject(MemberData(cls.__name__, cls.__name__, 'class', cls), cls)
+    return run, None
+
+def setUpFindItemByName() -> tuple:
+    '''Finds items in the tree by name.'''
+    model = MainModel()
+    loadModules(model, moduleNames)
+    return lambda: [model.findItemByName(name) for name in searchNames], None
+
+def setUpFindItemById() -> tuple:
+    '''Finds the items found by name in the tree again by ID.'''
+    model = MainModel()
+    loadModules(model, moduleNames)
+    indexes = [model.findItemByName(name) for name in searchNames]
+    ids = [utilities.getItemFromIndex(model.filteredTreeModel, index).id for index in indexes
+        if index.isValid()]
+    return lambda: [model.findItemById(id) for id in ids], None
+
+def setUpToggleCheckBox(text: str, searchText: str = '') -> Benchmark:
+    '''Returns a function that sets up a benchmark for checking and unchecking a filter checkbox in
+    the main window, optionally with search text.'''
+    def setUp() -> tuple:
+        configDirectory = tempfile.mkdtemp()
+        with open(f'{configDirectory}/config.json', 'w') as file:
+            json.dump({ 'moduleNames': moduleNames }, file)
+        window = MainWindow(Config(f'{configDirectory}/config.json'))
+        window.show()
+        loadModules(window._model, moduleNames)
+
+        # Wait for the tree view to be updated for the search text.
+        if len(searchText):
+            eventLoop = QEventLoop()
+            window._searchEdit.delayedTextChanged.connect(eventLoop.quit)
+            window._searchEdit.setText(searchText)
+            eventLoop.exec_()
+        checkBox = next(checkBox for checkBox in window.findChildren(QCheckBox) if checkBox.text() == text)
+        # Bind the window to the function, so that it isn't destroyed (along with the checkbox).
+        def run(window: MainWindow = window) -> None:
+            for _ in range(2):
+                checkBox.toggle()
+                QApplication.processEvents()
+        return run, None
+    setUp.__doc__ = f'Checks and unchecks "{text}"'
+    setUp.__doc__ += f', searching for "{searchText}".' if len(searchText) else '.'
+    return setUp
+
+def setUpRstToHtml() -> tuple:
+    '''Converts docstrings from the standard library to HTML.'''
+    docs = findDocs()
+    docs = docs[::max(1, len(docs) // docCount)][:docCount]
+    def run() -> None:
+        for doc in docs:
+            try:
+                rstToHtml(doc)
+            except:
+                pass
+    return run, None
+
+def setUpHighlighting() -> tuple:
+    '''Highlights the largest source files in the standard library (timing only the highlighting).'''
+    texts = []
+    for path in findLargestFiles(sourceFileCount):
+        with open(path, encoding = 'utf-8', errors = 'replace') as file:
+            texts.append(file.read())
+    return lambda: sum(highlight(text, Theme.LIGHT)[1] for text in texts), None
+
+def setUpModuleSelectionModel() -> tuple:
+    '''Discovers all available modules, without a cache.'''
+    return lambda: ModuleSelectionModel(), None
+
+def setUpModuleSelectionModelCached() -> tuple:
+    '''Discovers all available modules, with an up-to-date cache.'''
+    cacheFilename = f'{tempfile.mkdtemp()}/modules.json'
+    ModuleSelectionModel(cacheFilename)
+    return lambda: ModuleSelectionModel(cacheFilename), None
+
+benchmarks = {
+    'setModuleNames': setUpSetModuleNames,
+    'inspectObject': setUpInspectObject,
+    'findItemByName': setUpFindItemByName,
+    'findItemById': setUpFindItemById,
+    'toggleIncludePrivate': setUpToggleCheckBox('Include private members'),
+    'toggleIncludeInherited': setUpToggleCheckBox('Include inherited members'),
+    'toggleSortByType': setUpToggleCheckBox('Sort by type'),
+    'toggleMatchCase': setUpToggleCheckBox('Match case', 'parse'),
+    'rstToHtml': setUpRstToHtml,
+    'highlighting': setUpHighlighting,
+    'moduleSelectionModel': setUpModuleSelectionModel,
+    'moduleSelectionModelCached': setUpModuleSelectionModelCached,
+}
+
+def timeRun(run: Callable, reset: Callable) -> float:
+    '''Returns the time taken by one run of a benchmark.'''
+    if reset:
+        reset()
+    gc.collect()
+    startTime = time.perf_counter()
+    reportedTime = run()
+    elapsedTime = time.perf_counter() - startTime
+    return reportedTime if isinstance(reportedTime, float) else elapsedTime
+
+def measure(setUp: Benchmark, repeatCount: int) -> dict:
+    '''Sets up and runs a benchmark, returning the times taken and the peak memory allocated.'''
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+        contextlib.redirect_stderr(devnull):
+        run, reset = setUp()
+        timeRun(run, reset)
+        times = [timeRun(run, reset) for _ in range(repeatCount)]
+        if reset:
+            reset()
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peakMemory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'description': setUp.__doc__,
+        'times': times,
+        'median': statistics.median(times),
+        'min': min(times),
+        'max': max(times),
+        'peakMemory': peakMemory,
+    }
+
+def getEnvironment() -> dict:
+    '''Returns a description of the environment the benchmarks run in.'''
+    try:
+        revision = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output = True, text = True,
+            cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except:
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpuCount': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = 'Benchmarks for pyspector.')
+    parser.add_argument('--repeat', type = int, default = 5, help = 'the number of timed runs')
+    parser.add_argument('--output', help = 'a JSON file to save the results in')
+    parser.add_argument('--compare', help = 'a JSON file of earlier results to compare with')
+    parser.add_argument('names', nargs = '*', help = f'benchmarks to run: {", ".join(benchmarks)}')
+    arguments = parser.parse_args()
+    unknownNames = [name for name in arguments.names if name not in benchmarks]
+    if len(unknownNames):
+        parser.error(f'unknown benchmarks: {", ".join(unknownNames)}')
+    earlierResults = {}
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            earlierResults = json.load(file)['benchmarks']
+
+    app = QApplication([])
+    results = {}
+    print(f'{"benchmark":<28} {"median s":>10} {"min s":>10} {"max s":>10} {"peak MB":>10}' +
+        (f' {"vs earlier":>10}' if earlierResults else ''))
+    for name in arguments.names or benchmarks:
+        result = measure(benchmarks[name], arguments.repeat)
+        results[name] = result
+        line = (f'{name:<28} {result["median"]:>10.4f} {result["min"]:>10.4f} {result["max"]:>10.4f} '
+            f'{result["peakMemory"] / 1e6:>10.2f}')
+        if name in earlierResults:
+            line += f' {result["median"] / earlierResults[name]["median"]:>9.2f}x'
+        print(line, flush = True)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump({ 'version': resultsVersion, 'environment': getEnvironment(),
+                'repeatCount': arguments.repeat, 'benchmarks': results }, file, indent = 1)
+        print(f'Saved results to {arguments.output}')
+
+if __name__ == '__main__':
+    main()
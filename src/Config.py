@@ -1,5 +1,6 @@
 # External imports:
 import json
+from os.path import dirname
 
 class Config:
     '''A configuration object encapsulating all user-selectable options.'''
@@ -17,6 +18,13 @@ class Config:
         self._includeInheritedMembers = settings.get('includeInheritedMembers', False)
         self._sortByType = settings.get('sortByType', True)
         self._moduleNames = settings.get('moduleNames', ['builtins'])
+        self._lazyLoading = settings.get('lazyLoading', False)
+        self._inspectionEngine = settings.get('inspectionEngine', 'thread')
+
+    @property
+    def directory(self) -> str:
+        '''The directory containing the configuration file, where cached data is also stored.'''
+        return dirname(self._filename)
 
     @property
     def matchCase(self) -> bool:
@@ -68,6 +76,26 @@ class Config:
         self._moduleNames = value
         self._save()
 
+    @property
+    def lazyLoading(self) -> bool:
+        '''Whether or not the members of modules and classes are inspected only when expanded.'''
+        return self._lazyLoading
+
+    @lazyLoading.setter
+    def lazyLoading(self, value: bool) -> None:
+        self._lazyLoading = value
+        self._save()
+
+    @property
+    def inspectionEngine(self) -> str:
+        '''The engine used to inspect modules: 'thread' or 'process' (for crash isolation).'''
+        return self._inspectionEngine
+
+    @inspectionEngine.setter
+    def inspectionEngine(self, value: str) -> None:
+        self._inspectionEngine = value
+        self._save()
+
     def _save(self):
         '''Tries to save the current configuration. Errors are silently ignored.'''
         settings = {
@@ -76,6 +104,8 @@ class Config:
             'includeInheritedMembers': self.includeInheritedMembers,
             'sortByType': self.sortByType,
             'moduleNames': self.moduleNames,
+            'lazyLoading': self.lazyLoading,
+            'inspectionEngine': self.inspectionEngine,
         }
         try:
             with open(self._filename, 'w') as fp:
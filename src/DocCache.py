@@ -0,0 +1,88 @@
+# External imports:
+import hashlib
+import sqlite3
+import threading
+import time
+
+# Local imports:
+from rstToHtml import docToHtml, rendererVersion
+
+class DocCache:
+    '''
+    A persistent cache of documentation strings converted to HTML, stored in an SQLite database.
+
+    Entries are addressed by a hash of the documentation string, the default role, and the version
+    of the renderer, so the same documentation is only converted once, no matter which members
+    share it. Each entry records which renderer produced the HTML (see rstToHtml.docToHtml), which
+    is returned along with it. When the total size of the HTML exceeds the maximum, the least
+    recently used entries are discarded.
+
+    To keep database writes off the path of displaying cached documentation, the time an entry was
+    last used is only updated once it's more than lastUsedResolution seconds old.
+    '''
+
+    # The precision (in seconds) with which the time each entry was last used is recorded.
+    lastUsedResolution = 60 * 60
+
+    def __init__(self, filename: str, maxSize: int = 64 * 1024 * 1024):
+        '''Initializes a DocCache instance, creating the database if necessary.'''
+        self._maxSize = maxSize
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, check_same_thread = False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS docs '
+                '(key TEXT PRIMARY KEY, renderer TEXT, html TEXT, size INTEGER, lastUsed REAL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS docsByLastUsed ON docs (lastUsed)')
+            self._size = self._connection.execute('SELECT TOTAL(size) FROM docs').fetchone()[0]
+
+    def getHtml(self, doc: str, defaultRole: str = 'code') -> tuple:
+        '''Returns the HTML for a documentation string and the renderer that produced it ('rst',
+        'markdown', or 'plain'), converting it if it isn't cached.'''
+        key = hashlib.sha256(f'{rendererVersion}\0{defaultRole}\0{doc}'.encode(errors = 'surrogatepass')).hexdigest()
+        try:
+            with self._lock:
+                row = self._connection.execute('SELECT html, renderer, lastUsed FROM docs WHERE key = ?',
+                    (key,)).fetchone()
+                if row is not None:
+                    currentTime = time.time()
+                    if currentTime - row[2] > DocCache.lastUsedResolution:
+                        with self._connection:
+                            self._connection.execute('UPDATE docs SET lastUsed = ? WHERE key = ?',
+                                (currentTime, key))
+                    return row[0], row[1]
+        except:
+            pass
+
+        html, renderer = docToHtml(doc, defaultRole)
+        self._save(key, renderer, html)
+        return html, renderer
+
+    def _save(self, key: str, renderer: str, html: str) -> None:
+        '''Stores converted HTML, discarding old entries as needed. Errors are silently ignored.'''
+        size = len(html.encode(errors = 'surrogatepass'))
+        if size > self._maxSize:
+            return
+        try:
+            with self._lock, self._connection:
+                # Another thread may have saved the same entry, which is replaced.
+                row = self._connection.execute('SELECT size FROM docs WHERE key = ?', (key,)).fetchone()
+                self._connection.execute('INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?, ?)',
+                    (key, renderer, html, size, time.time()))
+                self._size += size - (row[0] if row else 0)
+                if self._size > self._maxSize:
+                    self._evict()
+        except:
+            pass
+
+    def _evict(self) -> None:
+        '''Discards the least recently used entries until the cache is back down to 90% of its
+        maximum size.'''
+        keys = []
+        excessSize = self._size - self._maxSize * 0.9
+        for key, size in self._connection.execute('SELECT key, size FROM docs ORDER BY lastUsed'):
+            if excessSize <= 0:
+                break
+            keys.append((key,))
+            excessSize -= size
+            self._size -= size
+        self._connection.executemany('DELETE FROM docs WHERE key = ?', keys)
@@ -0,0 +1,81 @@
+# External imports:
+from PyQt5.QtCore import QModelIndex, QSortFilterProxyModel
+
+# Local imports:
+from NameIndex import NameIndex
+import tracing
+from TreeModel import TreeModel, TreeNode
+
+class FilterModel(QSortFilterProxyModel):
+    '''
+    A proxy for a TreeModel that excludes private and inherited members (unless they're included),
+    and includes only the members whose names contain the search text, along with their ancestors.
+
+    Private and inherited members are recognized by flags stored in each node. Rather than testing
+    the descendants of every node (as recursive filtering does), the members that match the search
+    text are looked up in a NameIndex, so only the matching nodes, their ancestors, and the children
+    of those ancestors are examined. Call update after adding members to the index, so that
+    ancestors of the new members are included.
+    '''
+
+    def __init__(self, nameIndex: NameIndex):
+        '''Initializes a FilterModel instance.'''
+        super().__init__()
+        self._nameIndex = nameIndex
+        self._searchText = ''
+        self._foldedSearchText = ''
+        self._matchCase = False
+        self._excludedFlags = TreeNode.privateFlag | TreeNode.inheritedFlag
+        self._ancestorIds = set()
+
+    def setSearch(self, searchText: str, matchCase: bool) -> None:
+        '''Sets the text to search for, and whether matching is case-sensitive.'''
+        self._searchText = searchText
+        self._foldedSearchText = searchText.casefold()
+        self._matchCase = matchCase
+        self.update()
+
+    @tracing.traced('filter')
+    def setIncludedMembers(self, includePrivateMembers: bool, includeInheritedMembers: bool) -> None:
+        '''Sets whether private and inherited members are included.'''
+        self._excludedFlags = 0
+        if not includePrivateMembers:
+            self._excludedFlags |= TreeNode.privateFlag
+        if not includeInheritedMembers:
+            self._excludedFlags |= TreeNode.inheritedFlag
+        self.invalidateFilter()
+
+    @tracing.traced('filter')
+    def update(self) -> None:
+        '''Looks up the members that match the search text again, and reapplies the filter.'''
+        if len(self._searchText):
+            matchingIds = self._nameIndex.find(self._searchText, self._matchCase)
+            self._ancestorIds = NameIndex.getAncestorIds(matchingIds)
+        else:
+            self._ancestorIds = set()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, sourceRow: int, sourceParent: QModelIndex) -> bool:
+        '''Accepts a node unless it's excluded by the filters.'''
+        sourceModel: TreeModel = self.sourceModel()
+        siblings = sourceModel.getChildren(sourceModel.itemFromIndex(sourceParent))
+        return self._acceptsNode(siblings[sourceRow])
+
+    def _acceptsNode(self, node: TreeNode) -> bool:
+        '''Accepts a node if it's included and its name contains the search text, or if it has a
+        child that's accepted.'''
+        if node.flags & self._excludedFlags:
+            return False
+        if len(self._searchText) == 0:
+            return True
+
+        if self._matchCase:
+            if self._searchText in node.name:
+                return True
+        elif self._foldedSearchText in node.name.casefold():
+            return True
+
+        # Check the children of ancestors of matching nodes, since the matches may be excluded.
+        if node.id in self._ancestorIds:
+            return any(self._acceptsNode(childNode) for childNode in node.children)
+        return False
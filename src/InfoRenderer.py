@@ -0,0 +1,226 @@
+# External imports:
+from collections import deque
+from html import escape
+import threading
+import time
+from typing import NamedTuple
+from PyQt5.QtCore import pyqtSignal, QObject
+
+# Local imports:
+from DocCache import DocCache
+from inspection import MemberInfo
+from rstToHtml import plainTextToHtml
+import tracing
+from TreeModel import TreeNode
+
+class MemberSnapshot(NamedTuple):
+    '''The details of a member needed to render its page, gathered on the GUI thread (see
+    InfoRenderer.getSnapshot), so that rendering doesn't touch the tree or the member's value.'''
+    fullName: str
+    name: str
+    error: str
+    info: MemberInfo
+
+class InfoRenderCancelled(Exception):
+    '''Raised when rendering is cancelled because a newer request has been made.'''
+    pass
+
+class InfoRenderer(QObject):
+    '''
+    Renders the information displayed for members on a background thread.
+
+    Requests are made with snapshots of the members' details, gathered on the GUI thread, so the
+    background thread only converts documentation and builds HTML. Only the most recent request
+    matters: a request replaces any request that hasn't been started,
+    and rendering for an earlier request stops at the next opportunity. A page is a tuple of the
+    HTML, and the filename, starting line number, and number of lines of the member's source code
+    (or None for any that are unknown).
+
+    Pages can also be prefetched: rendered ahead of time for members that are likely to be selected
+    next, while there's nothing else to render, until a limited amount of time has been spent on
+    them. A request (or cancellation) discards any outstanding prefetch requests.
+
+    The pageRendered signal is emitted from the background thread, so connected slots run on the
+    thread of the receiving object.
+    '''
+
+    # Emitted with the key given to request, and the page, when a page has been rendered.
+    pageRendered = pyqtSignal(object, object)
+
+    def __init__(self, docCache: DocCache, parent: QObject = None):
+        '''Initializes an InfoRenderer instance.'''
+        super().__init__(parent)
+        self._docCache = docCache
+        self._condition = threading.Condition()
+        self._request = None
+        self._prefetchRequests = deque()
+        self._prefetchTimeLeft = 0
+        self._generation = 0
+
+        # Use a daemon thread, so that rendering can't prevent the application from exiting.
+        self._thread = threading.Thread(target = self._run, name = type(self).__name__, daemon = True)
+        self._thread.start()
+
+    def request(self, key: object, snapshot: MemberSnapshot) -> None:
+        '''Requests that the page for a member be rendered, cancelling any earlier request.'''
+        with self._condition:
+            self._generation += 1
+            self._request = (self._generation, key, snapshot)
+            self._prefetchRequests.clear()
+            self._condition.notify()
+
+    def prefetch(self, requests: list, timeLimit: float) -> None:
+        '''Requests that the pages for a list of (key, snapshot) tuples be rendered in order, when there's
+        no other request, spending no more than the time limit (in seconds) on them. Replaces any
+        earlier prefetch requests.'''
+        with self._condition:
+            self._prefetchRequests = deque(requests)
+            self._prefetchTimeLeft = timeLimit
+            self._condition.notify()
+
+    def cancel(self) -> None:
+        '''Cancels any outstanding request.'''
+        with self._condition:
+            self._generation += 1
+            self._request = None
+            self._prefetchRequests.clear()
+
+    @staticmethod
+    def renderHeader(item: TreeNode) -> str:
+        '''Returns HTML with the details of a member that are known without inspecting it: its name,
+        type, and error message (and its signature, for functions).'''
+        html = f'<h2>{InfoRenderer._getFullName(item)}</h2>'
+        html += f'<p><b>Type:</b> {escape(item.type)}</p>'
+        if len(item.error):
+            html += f'<p><b>Error:</b> {escape(item.error)}'
+        if item.type == 'function':
+            html += f'<p><b>Signature:</b> {escape(item.name)}</p>'
+        return html
+
+    @staticmethod
+    def getSnapshot(item: TreeNode, info: MemberInfo) -> MemberSnapshot:
+        '''Returns a snapshot of an item and the details of its member, for requesting its page.
+        Call this on the GUI thread.'''
+        return MemberSnapshot(InfoRenderer._getFullName(item), item.name, item.error, info)
+
+    @tracing.traced('renderPage')
+    def renderPage(self, snapshot: MemberSnapshot, generation: int = None) -> tuple:
+        '''Returns the page for a member. If a generation is given, raises InfoRenderCancelled once a
+        newer request has been made.'''
+        self._checkCancelled(generation)
+        error = snapshot.error
+        info = snapshot.info
+
+        # Display the fully qualified name of the item.
+        # TODO: Use __qualname__?
+        fullName = snapshot.fullName
+        html = f'<h2>{fullName}</h2>'
+        if info.qualifiedName is not None:
+            html += f'<h2>{info.qualifiedName}</h2>'
+
+        # Display the type.
+        html += f'<p><b>Type:</b> {escape(info.displayType)}</p>'
+
+        # Display object value.
+        if info.valueRepr is not None:
+            html += f'<p><b>Value:</b> {escape(info.valueRepr)}'
+
+        # Display error message.
+        if len(error):
+            html += f'<p><b>Error:</b> {escape(error)}'
+
+        # Display the filename for modules, or the filename and line number for other objects.
+        sourceFile = info.sourceFile
+        if sourceFile is not None and info.startLine is None:
+            html += f'<p><b>File:</b> <a href="file:{sourceFile}">{sourceFile}</a></p>'
+        elif sourceFile is not None:
+            html += f'<p><b>File:</b> <a href="file:{sourceFile}">{sourceFile} ({info.startLine})</a></p>'
+
+        # Display the inheritance hierarchy of classes.
+        if len(info.baseClasses) > 0:
+            html += '<p><b>Base classes:</b></p><ul>'
+            for moduleName, className in info.baseClasses:
+                html += f'<li><a href="item:{moduleName}/{className}">{className}</a> from {moduleName}</li>'
+            html += '</ul>'
+        if len(info.derivedClasses) > 0:
+            html += '<p><b>Derived classes:</b></p><ul>'
+            for moduleName, className in info.derivedClasses:
+                html += f'<li><a href="item:{moduleName}/{className}">{className}</a> from {moduleName}</li>'
+            html += '</ul>'
+
+        # Display the signature of callable objects.
+        if info.signature is not None:
+            html += f'<p><b>Signature:</b> {escape(info.signature)}</p>'
+
+        # Display documentation for non-object types, converting from reStructuredText or markdown
+        # to HTML (or using HTML converted previously).
+        doc = info.doc
+        if doc:
+            self._checkCancelled(generation)
+            # Check for special cases where docstrings are plain text.
+            if fullName in ['sys']:
+                docHtml = plainTextToHtml(doc)
+            else:
+                with tracing.span('docHtml') as span:
+                    docHtml, span.detail = self._docCache.getHtml(doc)
+            html += f'<hr>{docHtml}'
+
+        return html, sourceFile, info.startLine, info.lineCount
+
+    def _run(self) -> None:
+        '''Renders requested pages until the application exits.'''
+        while True:
+            # Render requested pages first, and prefetched pages when there's nothing else to do.
+            with self._condition:
+                while self._request is None and len(self._prefetchRequests) == 0:
+                    self._condition.wait()
+                isPrefetch = self._request is None
+                if isPrefetch:
+                    key, snapshot = self._prefetchRequests.popleft()
+                    generation = self._generation
+                else:
+                    generation, key, snapshot = self._request
+                    self._request = None
+
+            startTime = time.perf_counter()
+            try:
+                page = self.renderPage(snapshot, generation)
+            except InfoRenderCancelled:
+                continue
+            except:
+                # Leave pages that couldn't be prefetched to be rendered (and fail again) on request.
+                if isPrefetch:
+                    continue
+                page = (f'<h2>{escape(snapshot.name)}</h2><p>Could not display information.</p>', None, None, None)
+            finally:
+                if isPrefetch:
+                    self._chargePrefetchTime(time.perf_counter() - startTime)
+
+            # Don't bother reporting pages that are no longer wanted.
+            if not self._isCancelled(generation):
+                self.pageRendered.emit(key, page)
+
+    def _chargePrefetchTime(self, elapsedTime: float) -> None:
+        '''Deducts time spent prefetching, and stops prefetching once the time limit is reached.'''
+        with self._condition:
+            self._prefetchTimeLeft -= elapsedTime
+            if self._prefetchTimeLeft <= 0:
+                self._prefetchRequests.clear()
+
+    def _isCancelled(self, generation: int) -> bool:
+        with self._condition:
+            return generation is not None and generation != self._generation
+
+    def _checkCancelled(self, generation: int) -> None:
+        if self._isCancelled(generation):
+            raise InfoRenderCancelled()
+
+    @staticmethod
+    def _getFullName(item: TreeNode) -> str:
+        '''Returns the fully qualified name of an item.'''
+        fullName = item.name
+        tempItem = item.parent
+        while tempItem:
+            fullName = tempItem.name + '.' + fullName
+            tempItem = tempItem.parent
+        return fullName
@@ -0,0 +1,96 @@
+# External imports:
+from importlib.machinery import PathFinder
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+
+# Local imports:
+from inspection import MemberData
+
+# Increment this when the data stored for modules (see MemberData.toDict) changes, so that modules
+# cached in an earlier format are inspected again.
+formatVersion = 1
+
+class IntrospectionCache:
+    '''
+    A persistent cache of inspected modules, stored in an SQLite database.
+
+    Each module is stored along with a fingerprint of the file that defines it (its path,
+    modification time, and size), the version of the Python interpreter, and the version of the
+    format the module is stored in. A module is loaded from the cache only if its fingerprint still
+    matches, which can be checked without importing the module. Members loaded from the cache have
+    no values; use inspection.resolveValue to obtain them.
+    '''
+
+    def __init__(self, filename: str):
+        '''Initializes an IntrospectionCache instance, creating the database if necessary.'''
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, check_same_thread = False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS modules '
+                '(name TEXT PRIMARY KEY, fingerprint TEXT, data BLOB)')
+
+    def load(self, moduleName: str) -> MemberData:
+        '''Returns the cached data for a module, or None if it isn't cached or is out of date.'''
+        fingerprint = self._getFingerprint(moduleName)
+        if fingerprint is None:
+            return None
+        try:
+            with self._lock:
+                row = self._connection.execute('SELECT fingerprint, data FROM modules WHERE name = ?',
+                    (moduleName,)).fetchone()
+            if row is None or row[0] != fingerprint:
+                return None
+            return MemberData.fromDict(json.loads(zlib.decompress(row[1])))
+        except:
+            return None
+
+    def save(self, moduleName: str, moduleData: MemberData) -> None:
+        '''Stores the data for a module. Errors are silently ignored.'''
+        fingerprint = self._getFingerprint(moduleName)
+        if fingerprint is None:
+            return
+        try:
+            data = zlib.compress(json.dumps(moduleData.toDict()).encode())
+            with self._lock, self._connection:
+                self._connection.execute('INSERT OR REPLACE INTO modules VALUES (?, ?, ?)',
+                    (moduleName, fingerprint, data))
+        except:
+            pass
+
+    def _getFingerprint(self, moduleName: str) -> str:
+        '''Returns a string identifying the current version of a module, or None if the module can't
+        be located.'''
+        origin = self._findOrigin(moduleName)
+        if origin is None:
+            return None
+        if origin == 'built-in':
+            return json.dumps([origin, sys.version, formatVersion])
+        try:
+            stat = os.stat(origin)
+        except OSError:
+            return None
+        return json.dumps([origin, stat.st_mtime_ns, stat.st_size, sys.version, formatVersion])
+
+    def _findOrigin(self, moduleName: str) -> str:
+        '''Locates the file that defines a module, without importing the module or its parents.'''
+        if moduleName in sys.builtin_module_names:
+            return 'built-in'
+        path = None
+        spec = None
+        for part in moduleName.split('.'):
+            # Only the last part may be a module rather than a package.
+            if spec is not None and path is None:
+                return None
+            name = part if spec is None else f'{spec.name}.{part}'
+            try:
+                spec = PathFinder.find_spec(name, path)
+            except:
+                return None
+            if spec is None:
+                return None
+            path = spec.submodule_search_locations
+        return spec.origin if spec.has_location else None
@@ -0,0 +1,66 @@
+# External imports:
+from collections import OrderedDict
+from typing import Callable
+
+class LruCache:
+    '''
+    A cache that holds values up to a maximum total size, discarding the least recently used values
+    to make room for new ones.
+
+    The size of each value is determined by a function (by default, every value has size 1, so the
+    maximum size is a maximum number of values).
+    '''
+
+    def __init__(self, maxSize: int, getSize: Callable[[object], int] = None):
+        '''Initializes an LruCache instance.'''
+        self._maxSize = maxSize
+        self._getSize = getSize or (lambda value: 1)
+        self._entries = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        '''The total size of the values in the cache.'''
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def get(self, key: object, default: object = None) -> object:
+        '''Returns the value for a key (marking it as the most recently used), or the default.'''
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: object, value: object) -> None:
+        '''Stores the value for a key, discarding the least recently used values if necessary.'''
+        self.discard(key)
+        size = self._getSize(value)
+        if size > self._maxSize:
+            return
+        self._entries[key] = (value, size)
+        self._size += size
+        while self._size > self._maxSize:
+            _, (_, discardedSize) = self._entries.popitem(last = False)
+            self._size -= discardedSize
+
+    def discard(self, key: object) -> None:
+        '''Removes the value for a key, if present.'''
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def discardWhere(self, predicate: Callable[[object], bool]) -> None:
+        '''Removes the values for all keys that satisfy the predicate.'''
+        for key in [key for key in self._entries if predicate(key)]:
+            self.discard(key)
+
+    def clear(self) -> None:
+        '''Removes all values.'''
+        self._entries.clear()
+        self._size = 0
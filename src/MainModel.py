@@ -1,23 +1,47 @@
 # External imports:
-import importlib
-import inspect
 from os.path import dirname
-from PyQt5.QtCore import QSortFilterProxyModel, QRegularExpression, QModelIndex
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon, QBrush, QColor
+from PyQt5.QtCore import pyqtSignal, QObject, QSortFilterProxyModel, QModelIndex
+from PyQt5.QtGui import QIcon
 
 # Local imports:
+from FilterModel import FilterModel
+import inspection
+from inspection import MemberData, MemberInfo
+from IntrospectionCache import IntrospectionCache
+from ModuleLoader import ModuleLoader
+from NameIndex import NameIndex
+import tracing
+from TreeModel import TreeModel, TreeNode
 import utilities
 
-class MainModel():
+class MainModel(QObject):
     '''Data model for pyspector.'''
 
-    def __init__(self):
+    # Emitted with the module name when a module starts loading in the background.
+    moduleLoadingStarted = pyqtSignal(str)
+
+    # Emitted with the module name, the number of members inspected, and the total number of members.
+    moduleLoadingProgress = pyqtSignal(str, int, int)
+
+    # Emitted with the module name when a module has been added to the tree (or cancelled).
+    moduleLoadingFinished = pyqtSignal(str)
+
+    def __init__(self, parent: QObject = None):
         '''Initializes a MainModel instance.'''
+        super().__init__(parent)
         self._searchText = ''
         self._matchCase = False
         self._includePrivateMembers = False
         self._includeInheritedMembers = False
         self._sortByType = True
+        self._lazyLoading = False
+        self._moduleNames = []
+        self._loadingModuleNames = set()
+
+        # Create a loader that imports and inspects modules in the background.
+        self._moduleLoader = ModuleLoader(self)
+        self._moduleLoader.moduleProgress.connect(self.moduleLoadingProgress)
+        self._moduleLoader.moduleLoaded.connect(self._moduleLoaded)
 
         # Initialize icons.
         iconDir = f'{dirname(dirname(__file__))}/icons'
@@ -30,36 +54,18 @@ class MainModel():
             'object': QIcon(f'{iconDir}/object.svg')
         }
 
-        # Create the unfiltered tree model.
-        self._treeModel = QStandardItemModel()
-
-        # Create regular expressions that exclude or include private members.
-        self._excludePrivateRegEx = QRegularExpression('^[^_]|^__')
-        self._includePrivateRegEx = QRegularExpression('')
-
-        # Create regular expressions that exclude or include inherited members.
-        self._excludeInheritedRegEx = QRegularExpression('^$')
-        self._includeInheritedRegEx = QRegularExpression('')
-
-        # Create a filtered tree model used to exclude or include private members.
-        self._intermediateTreeModel = QSortFilterProxyModel()
-        self._intermediateTreeModel.setSourceModel(self._treeModel)
-        privateRegEx = self._includePrivateRegEx if self._includePrivateMembers else self._excludePrivateRegEx
-        self._intermediateTreeModel.setFilterRegularExpression(privateRegEx)
-
-        # Create a filtered tree model used to exclude or include inherited members.
-        self._secondIntermediateTreeModel = QSortFilterProxyModel()
-        self._secondIntermediateTreeModel.setSourceModel(self._intermediateTreeModel)
-        self._secondIntermediateTreeModel.setFilterKeyColumn(2)
-        inheritedRegEx = self._includeInheritedRegEx if self._includeInheritedMembers else self._excludeInheritedRegEx
-        self._secondIntermediateTreeModel.setFilterRegularExpression(inheritedRegEx)
-
-        # Create a filtered tree model that matches the search text.
-        self._filteredTreeModel = QSortFilterProxyModel()
-        self._filteredTreeModel.setSourceModel(self._secondIntermediateTreeModel)
-        self._filteredTreeModel.setRecursiveFilteringEnabled(True)
-        self._filteredTreeModel.setFilterFixedString(self._searchText)
-        self._filteredTreeModel.setFilterCaseSensitivity(1 if self._matchCase else 0)
+        # Create the unfiltered tree model, an index of the names of its items, and a dictionary for
+        # finding its items by ID.
+        self._treeModel = TreeModel(self._fetchChildren, self._icons)
+        self._nameIndex = NameIndex()
+        self._itemsById = {}
+
+        # Create a filtered tree model that excludes or includes private and inherited members, and
+        # matches the search text.
+        self._filteredTreeModel = FilterModel(self._nameIndex)
+        self._filteredTreeModel.setSourceModel(self._treeModel)
+        self._filteredTreeModel.setIncludedMembers(self._includePrivateMembers, self._includeInheritedMembers)
+        self._filteredTreeModel.setSearch(self._searchText, self._matchCase)
 
     @property
     def filteredTreeModel(self) -> QSortFilterProxyModel:
@@ -74,7 +80,7 @@ class MainModel():
     @searchText.setter
     def searchText(self, value: str) -> None:
         self._searchText = value
-        self._filteredTreeModel.setFilterFixedString(value)
+        self._filteredTreeModel.setSearch(value, self._matchCase)
 
     @property
     def matchCase(self) -> bool:
@@ -84,7 +90,7 @@ class MainModel():
     @matchCase.setter
     def matchCase(self, value: bool) -> None:
         self._matchCase = value
-        self._filteredTreeModel.setFilterCaseSensitivity(1 if value else 0)
+        self._filteredTreeModel.setSearch(self._searchText, value)
 
     @property
     def includePrivateMembers(self) -> bool:
@@ -94,8 +100,7 @@ class MainModel():
     @includePrivateMembers.setter
     def includePrivateMembers(self, value: bool) -> None:
         self._includePrivateMembers = value
-        regEx = self._includePrivateRegEx if value else self._excludePrivateRegEx
-        self._intermediateTreeModel.setFilterRegularExpression(regEx)
+        self._filteredTreeModel.setIncludedMembers(value, self._includeInheritedMembers)
 
     @property
     def includeInheritedMembers(self) -> bool:
@@ -105,8 +110,7 @@ class MainModel():
     @includeInheritedMembers.setter
     def includeInheritedMembers(self, value: bool) -> None:
         self._includeInheritedMembers = value
-        regEx = self._includeInheritedRegEx if value else self._excludeInheritedRegEx
-        self._secondIntermediateTreeModel.setFilterRegularExpression(regEx)
+        self._filteredTreeModel.setIncludedMembers(self._includePrivateMembers, value)
 
     @property
     def sortByType(self) -> bool:
@@ -116,30 +120,90 @@ class MainModel():
     @sortByType.setter
     def sortByType(self, value: bool) -> None:
         self._sortByType = value
-        self._sort()
+        self._treeModel.sortByType = value
 
-    def setModuleNames(self, moduleNames) -> None:
-        '''Adds the specified modules to the tree, removing any that are no longer needed.'''
-        # Remove any modules that aren't in the list.
-        rootItem: QStandardItem = self._treeModel.invisibleRootItem()
-        for i in range(rootItem.rowCount() - 1, -1, -1):
-            if rootItem.child(i).text() not in moduleNames:
-                rootItem.removeRow(i)
-
-        # Add all the modules in the list.
-        for moduleName in moduleNames:
-            self._addModule(moduleName)
+    @property
+    def lazyLoading(self) -> bool:
+        '''Whether or not the members of modules and classes are inspected only when expanded.'''
+        return self._lazyLoading
+
+    @lazyLoading.setter
+    def lazyLoading(self, value: bool) -> None:
+        # Note that this only affects modules and classes that are added afterward.
+        self._lazyLoading = value
+        self._moduleLoader.lazyLoading = value
 
-        # Sort.
-        self._sort()
+    @property
+    def inspectionEngine(self) -> str:
+        '''The engine used to inspect modules: 'thread' or 'process' (see ModuleLoader).'''
+        return self._moduleLoader.engine
+
+    @inspectionEngine.setter
+    def inspectionEngine(self, value: str) -> None:
+        # Note that this only affects modules that are added afterward.
+        self._moduleLoader.engine = value if value in ModuleLoader.engines else 'thread'
 
-    def _sort(self) -> None:
-        # Sort all items alphabetically by name.
-        self._treeModel.sort(0)
+    def setCacheFilename(self, filename: str) -> None:
+        '''Caches inspected modules in the specified database file, so that modules that haven't
+        changed can be loaded without importing them.'''
+        self._moduleLoader.cache = IntrospectionCache(filename)
 
-        # Optionally, sort by type.
-        if self.sortByType:
-            self._treeModel.sort(1)
+    @property
+    def loadingModuleNames(self) -> set:
+        '''The names of modules that are still being loaded in the background.'''
+        return self._loadingModuleNames
+
+    def setModuleNames(self, moduleNames) -> None:
+        '''
+        Adds the specified modules to the tree, removing any that are no longer needed.
+
+        Modules are imported and inspected in the background. Each one appears in the tree as soon
+        as it has been inspected.
+        '''
+        self._moduleNames = list(moduleNames)
+        moduleNameSet = set(moduleNames)
+
+        # Remove any modules that aren't in the list, and stop loading them.
+        removedItems = [item for item in self._treeModel.topLevelNodes if item.name not in moduleNameSet]
+        for item in removedItems:
+            self._nameIndex.removeModule(item.name)
+            self._forgetItems(item)
+        self._treeModel.removeNodes(removedItems)
+        for moduleName in self._loadingModuleNames - moduleNameSet:
+            self._moduleLoader.cancel(moduleName)
+            self._loadingModuleNames.discard(moduleName)
+            self.moduleLoadingFinished.emit(moduleName)
+
+        # Start loading any modules in the list that haven't been added (each one is inserted into
+        # the tree in place once it has been loaded).
+        for moduleName in moduleNames:
+            self._loadModule(moduleName)
+
+    def cancelModule(self, moduleName: str) -> None:
+        '''Stops loading a module, adding it to the tree with an error message instead.'''
+        if moduleName in self._loadingModuleNames:
+            self._moduleLoader.cancel(moduleName)
+            moduleData = MemberData(moduleName, moduleName, 'module', None, error = 'Loading was cancelled.')
+            self._moduleLoaded(moduleName, moduleData)
+
+    def getMemberInfo(self, item: TreeNode) -> MemberInfo:
+        '''Returns the details of the member associated with an item.'''
+        # Use the details gathered in advance, if available (as they are for modules inspected in
+        # another process).
+        if item.info is not None:
+            return item.info
+
+        # Otherwise, gather the details from the value, obtaining the value first if the member was
+        # loaded from the cache.
+        if not item.hasValue:
+            try:
+                item.value = inspection.resolveValue(item.id)
+            except:
+                info = MemberInfo()
+                info.displayType = item.type
+                return info
+            item.hasValue = True
+        return inspection.describeMember(item.type, item.value)
 
     def _dumpTree(self, parentIndex = QModelIndex(), depth = 0) -> None:
         rowCount = self._treeModel.rowCount(parentIndex)
@@ -147,134 +211,115 @@ class MainModel():
             index = self._treeModel.index(row, 0, parentIndex)
             item = self._treeModel.itemFromIndex(index)
             indent = '  ' * depth
-            id = item.data()['id']
-            print(f'{indent}{id}')
+            print(f'{indent}{item.id}')
             self._dumpTree(index, depth + 1)
 
     def findItemByName(self, name: str) -> QModelIndex:
         '''Finds the item with the specified name.'''
+        # Look up the IDs of items with matching and containing names.
+        matchingIds = self._nameIndex.find(name, self.matchCase, exact = True)
+        containingIds = self._nameIndex.find(name, self.matchCase)
+
+        # Try for a full match, then a partial match, choosing the first match (in the order
+        # displayed) that isn't filtered out. The filter model maps an item whose ancestor is
+        # filtered out to an index whose ancestors are missing, so check its path is complete.
+        for ids in [matchingIds, containingIds]:
+            matches = []
+            for id in ids:
+                item = self._itemsById.get(id)
+                if item is not None:
+                    index = self._filteredTreeModel.mapFromSource(self._treeModel.indexFromItem(item))
+                    path = utilities.getIndexPath(index)
+                    if len(path) == id.count('/') + 1:
+                        matches.append((path, index))
+            if len(matches):
+                return min(matches, key = lambda match: match[0])[1]
+
+        return QModelIndex()
 
-        # Create search predicates for matching and containing name.
-        if self.matchCase:
-            itemHasName = lambda item: item.text() == name
-            itemContainsName = lambda  item: name in item.text()
-        else:
-            nameNoCase = name.casefold()
-            itemHasName = lambda item: item.text().casefold() == nameNoCase
-            itemContainsName = lambda item: nameNoCase in item.text().casefold()
+    def findItemById(self, id: str) -> QModelIndex:
+        '''
+        Finds the item with the specified ID.
+
+        Returns an invalid index if there's no such item, or if the item is excluded by the current
+        filters (use containsItem to tell the difference).
+        '''
+        if self.lazyLoading:
+            self._fetchItemsAlongPath(id)
+        item = self._itemsById.get(id)
+        if item is None:
+            return QModelIndex()
+
+        return self._filteredTreeModel.mapFromSource(self._treeModel.indexFromItem(item))
+
+    def containsItem(self, id: str) -> bool:
+        '''Returns whether the tree contains the item with the specified ID, even if it's filtered out.'''
+        return id in self._itemsById
+
+    def _loadModule(self, moduleName: str) -> None:
+        '''Starts loading a module in the background, unless it has already been added.'''
+        # Check to see if module has already been added.
+        if moduleName in self._loadingModuleNames or moduleName in self._itemsById:
+            return
 
-        # Try for a full match, then a partial match.
-        for predicate in [itemHasName, itemContainsName]:
-            index = utilities.findIndexInModel(self._filteredTreeModel, predicate)
-            if index.isValid():
-                break
+        self._loadingModuleNames.add(moduleName)
+        self.moduleLoadingStarted.emit(moduleName)
+        self._moduleLoader.load(moduleName)
 
-        return index
+    def _moduleLoaded(self, moduleName: str, moduleData: MemberData) -> None:
+        '''Adds a module that has finished loading to the tree.'''
+        # Ignore modules that have been cancelled or removed in the meantime.
+        if moduleName not in self._loadingModuleNames:
+            return
+        self._loadingModuleNames.discard(moduleName)
 
-    def findItemById(self, id: str) -> QModelIndex:
-        '''Finds the item with the specified ID.'''
-        print(f'looking for item with id {id}')
-        predicate = lambda item: item.data()['id'] == id
-        index = utilities.findIndexInModel(self._filteredTreeModel, predicate)
-        return index
+        with tracing.span('addModule', moduleName):
+            self._treeModel.insertNodes(None, [self._createItem(moduleData)])
 
-    def _addModule(self, moduleName, depth = 0):
-        # Check to see if module has already been added.
-        rootItem = self._treeModel.invisibleRootItem()
-        if self._parentContainsItem(rootItem, moduleName):
-            return
+            # Include any new matches for the search text.
+            if len(self._searchText):
+                self._filteredTreeModel.update()
+        self.moduleLoadingFinished.emit(moduleName)
 
+    def _fetchChildren(self, item: TreeNode) -> None:
+        '''Inspects the object associated with a pending item, adding its members as children.'''
+        depth = item.id.count('/')
+        parentData = MemberData(item.id, item.name, item.type, item.value)
         try:
-            module = importlib.import_module(moduleName)
-            item = self._addItem(rootItem, moduleName, moduleName, 'module', module)
-            self._inspectObject(item, module, depth)
-        except:
-            self._addItem(rootItem, moduleName, moduleName, 'module', None, error = 'Could not import module.')
-
-    def _parentContainsItem(self, parentItem: QStandardItem, id: str) -> bool:
-        for row in range(parentItem.rowCount()):
-            childId = parentItem.child(row).data()['id']
-            if childId == id:
-                return True
-        return False
-
-    def _inspectObject(self, parentItem: QStandardItem, obj: object, depth: int) -> None:
-        '''Recursively adds object to the hierarchical model.'''
-        for (memberName, memberValue) in inspect.getmembers(obj):
-            memberType = self._getMemberType(memberValue)
-
-            # Skip "magic" members that are classes -- they cause problems.
-            if memberName.startswith('__') and memberType == 'class':
-                continue
-
-            # Skip modules within modules.
-            if memberType == 'module':
-                # TODO: Should we add nested modules? Seems useful, but leads to a segfault in the
-                # case of matplotlib. 
-                #print(f'{"  "*depth}adding nested module {memberName}: {memberValue.__name__}')
-                #self._addModule(memberValue, depth + 1)
-                continue
-
-            # Don't add the same item twice.
-            parentId = parentItem.data()['id']
-            id = f'{parentId}/{memberName}'
-            if self._parentContainsItem(parentItem, id):
-                continue
-
-            # Check inheritance of class members.
-            inheritance = 'inherited' if inspect.isclass(obj) and memberName not in obj.__dict__ else ''
-
-            # For functions, try to include the signature in the name.
-            name = memberName
-            if memberType == 'function':
-                try:
-                    name += str(inspect.signature(memberValue))
-                except:
-                    pass
-
-            # Add an item for the current member.
-            item = self._addItem(parentItem, id, name, memberType, memberValue, inheritance)
-
-            # Recurse into classes (but not if it's the same class we're inspecting).
-            if 'class' in memberType and memberValue != obj:
-                print(f'{"  "*depth}inspecting class {memberName} in module {memberValue.__module__}')
-                self._inspectObject(item, memberValue, depth + 1)
-
-            # Recurse into property getter, setter, deleter functions.
-            # TODO: Generalize this to data descriptors other than just the 'property' class.
-            if type(memberValue) == property:
-                if memberValue.fget:
-                    self._addItem(item, f'{id}/get', '[get]', 'function', memberValue.fget)
-                if memberValue.fset:
-                    self._addItem(item, f'{id}/set', '[set]', 'function', memberValue.fset)
-                if memberValue.fdel:
-                    self._addItem(item, f'{id}/delete', '[delete]', 'function', memberValue.fdel)
-
-    def _addItem(self, parentItem: QStandardItem, id: str, name: str, type: str, value: object, inheritance: str = '', error: str = '') -> QStandardItem:
-        '''Adds one model item to a parent model item.'''
-        key = type if type in self._icons else 'object'
-        item1 = QStandardItem(self._icons[key], name)
-        item1.setData({ 'id': id, 'type': type, 'value': value, 'error': error })
-        item1.setEditable(False)
-        if len(error):
-            item1.setBackground(QBrush(QColor(255, 0, 0, 64)))
-        item2 = QStandardItem(type)
-        item2.setEditable(False)
-        item3 = QStandardItem(inheritance)
-        item3.setEditable(False)
-        parentItem.appendRow([item1, item2, item3])
-        return item1
-
-    def _getMemberType(self, memberValue: object) -> str:
-        '''Attempts to determine the type of a member from its value.'''
-        if inspect.ismodule(memberValue):
-            return 'module'
-        if inspect.isabstract(memberValue):
-            return 'abstract base class'
-        if inspect.isclass(memberValue):
-            return 'class'
-        if inspect.isfunction(memberValue) or inspect.isbuiltin(memberValue) or inspect.isroutine(memberValue):
-            return 'function'
-        if inspect.isdatadescriptor(memberValue):
-            return 'property'
-        return 'object'
+            with tracing.span('inspect', item.id):
+                inspection.inspectObject(parentData, item.value, self.lazyLoading, depth)
+        except Exception as exception:
+            # This runs within Qt's fetchMore, which an exception would abort the application from,
+            # so mark the item with an error instead (leaving it without children).
+            item.error = f'Could not inspect {item.type} ({exception}).'
+            index = self._treeModel.indexFromItem(item)
+            self._treeModel.dataChanged.emit(index, index)
+            return
+        self._treeModel.insertNodes(item, [self._createItem(childData) for childData in parentData.children])
+
+    def _fetchItemsAlongPath(self, id: str) -> None:
+        '''Fetches the children of any pending items along the path to the item with the given ID.'''
+        parts = id.split('/')
+        for i in range(1, len(parts)):
+            item = self._itemsById.get('/'.join(parts[:i]))
+            if item is None:
+                return
+            self._treeModel.fetchItem(item)
+
+    def _forgetItems(self, item: TreeNode) -> None:
+        '''Recursively removes an item and its children from the dictionary of items by ID.'''
+        self._itemsById.pop(item.id, None)
+        for childItem in item.children:
+            self._forgetItems(childItem)
+
+    def _createItem(self, memberData: MemberData) -> TreeNode:
+        '''Recursively creates an item (not yet added to the tree) for the given member data and its children.'''
+        item = TreeNode(memberData.id, memberData.name, memberData.type, memberData.inheritance,
+            memberData.value, memberData.hasValue, memberData.error, memberData.info)
+        self._nameIndex.add(item.id, item.name)
+        self._itemsById[item.id] = item
+        if memberData.pending:
+            item.pending = True
+        elif len(memberData.children):
+            self._treeModel.setChildren(item, [self._createItem(childData) for childData in memberData.children])
+        return item
@@ -1,28 +1,55 @@
 # External imports:
-import inspect
+import os
 import platform
-from html import escape
-from markdown import markdown
-from PyQt5.QtCore import Qt, QEvent, QItemSelectionModel, QModelIndex, QUrl
-from PyQt5.QtGui import (QColor, QFont, QKeySequence, QStandardItem, QStandardItemModel,
-    QTextCursor, QTextFormat)
-from PyQt5.QtWidgets import (QAction, QCheckBox, QHBoxLayout, QMainWindow, QPlainTextEdit,
-    QPushButton, QShortcut, QSplitter, QTextBrowser, QTextEdit, QVBoxLayout, QWidget)
+import sys
+import threading
+import time
+from PyQt5.QtCore import Qt, QEvent, QItemSelectionModel, QModelIndex, QRect, QTimer, QUrl
+from PyQt5.QtGui import (QColor, QFont, QKeySequence, QStandardItemModel,
+    QTextCursor, QTextDocument, QTextFormat)
+from PyQt5.QtWidgets import (QAction, QCheckBox, QFileDialog, QHBoxLayout, QLabel, QMainWindow,
+    QPlainTextDocumentLayout, QPlainTextEdit, QPushButton, QShortcut, QSplitter, QTextBrowser, QTextEdit,
+    QVBoxLayout, QWidget)
 import webbrowser
 
 # Local imports:
 from Config import Config
+from DocCache import DocCache
+from InfoRenderer import InfoRenderer, MemberSnapshot
+from LruCache import LruCache
 from MainModel import MainModel
+from ModuleLoadingPanel import ModuleLoadingPanel
 from ModuleSelectionDialog import ModuleSelectionDialog
 from PythonSyntaxHighlighter import PythonSyntaxHighlighter, Theme
-from rstToHtml import rstToHtml
 from SearchEdit import SearchEdit
+from TreeModel import TreeNode
 from TreeView import TreeView
+import tracing
 import utilities
 
 class MainWindow(QMainWindow):
     '''The main window of the application.'''
 
+    # The maximum number of bytes of HTML to keep in the cache of information displayed for items.
+    _infoCacheSize = 16 * 1024 * 1024
+
+    # The maximum number of characters of source code to keep in the cache of highlighted files.
+    # (The highlighters' tokens take roughly another 6 bytes per character.)
+    _sourceCacheSize = 2 * 1024 * 1024
+
+    # The number of milliseconds to wait after the selection changes before rendering information.
+    _infoDelay = 50
+
+    # The number of rows above and below the selected item, and the number of its children, for
+    # which information is rendered ahead of time once the selection settles, the number of
+    # milliseconds to wait before starting, and the number of seconds to spend on it at most (in
+    # the background, and gathering the details of the members on the GUI thread).
+    _prefetchRowCount = 2
+    _prefetchChildCount = 4
+    _prefetchDelay = 200
+    _prefetchTimeLimit = 0.5
+    _prefetchGatherTimeLimit = 0.02
+
     def __init__(self, config: Config):
         '''Initializes a MainWindow instance.'''
         super().__init__()
@@ -30,13 +57,44 @@ class MainWindow(QMainWindow):
         # Store configuration.
         self._config = config
 
+        # Create a cache of the information displayed for recently selected items, by item ID. The
+        # pages don't depend on the theme, since their colors come from the default style sheet.
+        self._infoCache = LruCache(MainWindow._infoCacheSize, lambda page: sys.getsizeof(page[0]))
+
+        # Create a cache of the documents (and their syntax highlighters) for recently displayed
+        # source files, so that files don't have to be read and highlighted again.
+        self._sourceCache = LruCache(MainWindow._sourceCacheSize, lambda entry: entry[0].characterCount())
+        self._sourceKey = None
+        self._sourceDocument = None
+        self._sourceHighlighter = None
+        self._sourceTheme = None
+
         # Create model.
         self._model = MainModel()
+        self._model.moduleLoadingStarted.connect(self._discardCachedInfo)
         self._model.matchCase = config.matchCase
         self._model.includePrivateMembers = config.includePrivateMembers
         self._model.includeInheritedMembers = config.includeInheritedMembers
         self._model.sortByType = config.sortByType
-        self._model.setModuleNames(config.moduleNames)
+        self._model.lazyLoading = config.lazyLoading
+        self._model.inspectionEngine = config.inspectionEngine
+        self._model.setCacheFilename(f'{config.directory}/introspection.sqlite')
+
+        # Create a persistent cache of documentation converted to HTML, and a renderer that
+        # produces the information displayed for items in the background.
+        self._docCache = DocCache(f'{config.directory}/docs.sqlite')
+        self._infoRenderer = InfoRenderer(self._docCache, self)
+        self._infoRenderer.pageRendered.connect(self._pageRendered)
+        self._pendingInfoKey = None
+        self._pendingInfoItem = None
+        self._infoTimer = QTimer(self)
+        self._infoTimer.setSingleShot(True)
+        self._infoTimer.setInterval(MainWindow._infoDelay)
+        self._infoTimer.timeout.connect(self._infoTimerTimeout)
+        self._prefetchTimer = QTimer(self)
+        self._prefetchTimer.setSingleShot(True)
+        self._prefetchTimer.setInterval(MainWindow._prefetchDelay)
+        self._prefetchTimer.timeout.connect(self._prefetchNeighbors)
 
         # Configure window.
         self.setWindowTitle('pyspector')
@@ -77,6 +135,12 @@ class MainWindow(QMainWindow):
         selectionModel = self._treeView.selectionModel()
         selectionModel.currentChanged.connect(self._treeViewSelectionChanged)
 
+        self._moduleLoadingPanel = ModuleLoadingPanel()
+        self._moduleLoadingPanel.cancelRequested.connect(self._model.cancelModule)
+        self._model.moduleLoadingStarted.connect(self._moduleLoadingPanel.addModule)
+        self._model.moduleLoadingProgress.connect(self._moduleLoadingPanel.setProgress)
+        self._model.moduleLoadingFinished.connect(self._moduleLoadingFinished)
+
         selectModulesButton = QPushButton()
         selectModulesButton.setText('Select modules')
         selectModulesButton.clicked.connect(self._selectModulesButtonClicked)
@@ -88,6 +152,7 @@ class MainWindow(QMainWindow):
         leftLayout.addWidget(includeInheritedCheckBox)
         leftLayout.addWidget(sortByTypeCheckBox)
         leftLayout.addWidget(self._treeView)
+        leftLayout.addWidget(self._moduleLoadingPanel)
         leftLayout.addWidget(selectModulesButton)
         leftLayout.setContentsMargins(0, 0, 0, 0)
         leftWidget = QWidget()
@@ -104,7 +169,10 @@ class MainWindow(QMainWindow):
         self._sourceTextViewer.setReadOnly(True)
         self._sourceTextViewer.setFont(fixedPitchFont)
         self._sourceTextViewer.setLineWrapMode(QPlainTextEdit.NoWrap)
-        self._sourceTextHighlighter = PythonSyntaxHighlighter(self._sourceTextViewer.document())
+        self._sourceErrorDocument = self._createSourceDocument()
+        self._sourceErrorDocument.setParent(self)
+        self._sourceTextViewer.setDocument(self._sourceErrorDocument)
+        self._sourceTextViewer.updateRequest.connect(self._sourceTextViewerUpdateRequested)
 
         rightSplitter = QSplitter()
         rightSplitter.setOrientation(Qt.Vertical)
@@ -130,20 +198,37 @@ class MainWindow(QMainWindow):
         findShortcut = QShortcut(QKeySequence.Find, centralWidget)
         findShortcut.activated.connect(self._findShortcutActivated)
 
+        # Create a menu for tracing where time is spent, and a status bar label that shows how long
+        # the last operation took while tracing.
+        toolsMenu = self.menuBar().addMenu('Tools')
+        traceAction = toolsMenu.addAction('Trace Performance')
+        traceAction.setCheckable(True)
+        traceAction.setChecked(tracing.isEnabled())
+        traceAction.toggled.connect(self._traceActionToggled)
+        exportTraceAction = toolsMenu.addAction('Export Trace...')
+        exportTraceAction.triggered.connect(self._exportTraceActionTriggered)
+        self._traceLabel = QLabel()
+        self._traceLabel.setVisible(tracing.isEnabled())
+        self.statusBar().addPermanentWidget(self._traceLabel)
+        tracing.addListener(self._spanEnded)
+
         # Make sure colors are correct for current palette.
         self._updateColors()
 
-        # Show the window.
+        # Show the window, then start loading modules in the background.
         self.show()
+        self._model.setModuleNames(config.moduleNames)
 
     def _findShortcutActivated(self) -> None:
         self._searchEdit.selectAll()
         self._searchEdit.setFocus()
 
+    @tracing.traced('search')
     def _searchEditTextChanged(self, text: str) -> None:
         '''Filters the tree view to show just those items relevant to the search text.'''
         self._model.searchText = text
 
+    @tracing.traced('matchCase')
     def _matchCaseCheckBoxStateChanged(self, state: Qt.CheckState) -> None:
         '''Determines whether matching is case-sensitive.'''
         isChecked = state == Qt.Checked
@@ -151,6 +236,7 @@ class MainWindow(QMainWindow):
         self._model.matchCase = isChecked
         self._selectFirstMatch()
 
+    @tracing.traced('includePrivateMembers')
     def _includePrivateCheckBoxStateChanged(self, state: Qt.CheckState) -> None:
         ''' Includes or excludes private members from the tree view.'''
         isChecked = state == Qt.Checked
@@ -158,6 +244,7 @@ class MainWindow(QMainWindow):
         self._model.includePrivateMembers = isChecked
         self._selectFirstMatch()
 
+    @tracing.traced('includeInheritedMembers')
     def _includeInheritedCheckBoxStateChanged(self, state: Qt.CheckState) -> None:
         ''' Includes or excludes inherited members from the tree view.'''
         isChecked = state == Qt.Checked
@@ -165,12 +252,14 @@ class MainWindow(QMainWindow):
         self._model.includeInheritedMembers = isChecked
         self._selectFirstMatch()
 
+    @tracing.traced('sortByType')
     def _sortByTypeCheckBoxStateChanged(self, state: Qt.CheckState) -> None:
         ''' Includes or excludes private members from the tree view.'''
         isChecked = state == Qt.Checked
         self._config.sortByType = isChecked
         self._model.sortByType = isChecked
 
+    @tracing.traced('selectFirstMatch')
     def _selectFirstMatch(self) -> None:
         # Select the first match to the current search text (if any).
         searchText = self._model.searchText
@@ -199,8 +288,17 @@ class MainWindow(QMainWindow):
         self._textBrowser.document().setDefaultStyleSheet(f'* {{ color: {textColor}; }} a {{ color: {linkColor}; }}')
         self._updateInfo()
         self._sourceTextViewer.setStyleSheet(f'QPlainTextEdit {{ color: {textColor}; }}')
-        self._sourceTextHighlighter.theme = Theme.DARK if isDark else Theme.LIGHT
 
+        # Highlight the displayed source code for the new theme. Other cached source code is
+        # highlighted for the new theme when it's displayed again, which only formats its tokens.
+        theme = Theme.DARK if isDark else Theme.LIGHT
+        if theme != self._sourceTheme:
+            self._sourceTheme = theme
+            if self._sourceKey is not None:
+                self._sourceHighlighter.theme = theme
+                self._highlightVisibleSource()
+
+    @tracing.traced('selectItem')
     def _treeViewSelectionChanged(self, index: QModelIndex, oldIndex: QModelIndex) -> None:
         '''Displays appropriate information whenever the tree view selection changes.'''
         self._updateInfo(index)
@@ -216,136 +314,125 @@ class MainWindow(QMainWindow):
         if item:
             self._displayInfo(item)
         else:
+            self._pendingInfoKey = None
+            self._infoRenderer.cancel()
+            self._prefetchTimer.stop()
             self._textBrowser.clear()
 
-    def _displayInfo(self, item: QStandardItem) -> None:
+    @tracing.traced('displayInfo')
+    def _displayInfo(self, item: TreeNode) -> None:
         '''Updates the detailed view to show information about the selected object.'''
-        data = item.data()
-        memberType = data['type']
-        memberValue = data['value']
-        error = data['error']
-
-        # Display the fully qualified name of the item.
-        # TODO: Use __qualname__?
-        fullName = item.text()
-        tempItem = item.parent()
-        while tempItem:
-            fullName = tempItem.text() + '.' + fullName
-            tempItem = tempItem.parent()
-        html = f'<h2>{fullName}</h2>'
-        if hasattr(memberValue, '__qualname__'):
-            html += f'<h2>{memberValue.__qualname__}</h2>'
-
-        # Display the type.
-        displayType = memberType
-        if memberType == 'object':
-            displayType = str(type(memberValue))
-        html += f'<p><b>Type:</b> {escape(displayType)}</p>'
-
-        # Display object value.
-        if memberType == 'object':
-            html += f'<p><b>Value:</b> {escape(repr(memberValue))}'
-
-        # Display error message.
-        if len(error):
-            html += f'<p><b>Error:</b> {escape(error)}'
-
-        # Display the filename for modules.
-        # See if we can find the source file for other objects.
-        if memberType == 'module' and hasattr(memberValue, '__file__'):
-            html += f'<p><b>File:</b> <a href="file:{memberValue.__file__}">{memberValue.__file__}</a></p>'
-            self._displaySource(memberValue.__file__)
+        # Display the information right away if it's cached.
+        page = self._infoCache.get(item.id)
+        if page is not None:
+            self._pendingInfoKey = None
+            self._infoRenderer.cancel()
+            self._displayPage(page)
+            return
+
+        # Otherwise, display what's known about the object right away, and render the rest in the
+        # background. Wait a moment before starting, in case the selection changes again quickly
+        # (for instance, while an arrow key is held down).
+        self._textBrowser.setHtml(InfoRenderer.renderHeader(item))
+        self._pendingInfoKey = item.id
+        self._pendingInfoItem = item
+        self._infoRenderer.cancel()
+        self._prefetchTimer.stop()
+        self._infoTimer.start()
+
+    def _infoTimerTimeout(self) -> None:
+        '''Starts rendering the information for the most recently selected object.'''
+        if self._pendingInfoKey is not None:
+            self._infoRenderer.request(self._pendingInfoKey, self._getSnapshot(self._pendingInfoItem))
+
+    def _pageRendered(self, key: str, page: tuple) -> None:
+        '''Caches a page rendered in the background, and displays it if it's still wanted.'''
+        self._infoCache.put(key, page)
+        if key == self._pendingInfoKey:
+            self._pendingInfoKey = None
+            self._displayPage(page)
+
+    @tracing.traced('displayPage')
+    def _displayPage(self, page: tuple) -> None:
+        '''Displays a page rendered by InfoRenderer, along with the corresponding source code.'''
+        html, sourceFile, startLine, lineCount = page
+        self._textBrowser.setHtml(html)
+        if sourceFile is not None:
+            self._displaySource(sourceFile, startLine, lineCount)
         else:
-            try:
-                # Substitute the getter, setter, or deleter for a property instance.
-                # TODO: Generalize this to data descriptors other than just the 'property' class.
-                if isinstance(memberValue, property):
-                    if memberValue.fget:
-                        memberValue = memberValue.fget
-                    elif memberValue.fset:
-                        memberValue = memberValue.fset
-                    elif memberValue.fdel:
-                        memberValue = memberValue.fdel
-
-                # Note that inspect.getsourcelines calls unwrap, while getsourcefile does not.
-                sourceFile = inspect.getsourcefile(inspect.unwrap(memberValue))
-                lines = inspect.getsourcelines(memberValue)
-                html += f'<p><b>File:</b> <a href="file:{sourceFile}">{sourceFile} ({lines[1]})</a></p>'
-                self._displaySource(sourceFile, lines[1], len(lines[0]))
-            except:
-                self._displaySourceError('Could not locate source code.')
-
-        # Display the inheritance hierarchy of classes.
-        if 'class' in memberType:
-            try:
-                baseClasses = inspect.getmro(memberValue)
-                if len(baseClasses) > 1:
-                    html += '<p><b>Base classes:</b></p><ul>'
-                    baseClasses = list(baseClasses)[1:] # omit the first entry
-                    for baseClass in reversed(baseClasses):
-                        moduleName = baseClass.__module__
-                        className = baseClass.__qualname__
-                        html += f'<li><a href="item:{moduleName}/{className}">{className}</a> from {moduleName}</li>'
-                    html += '</ul>'
-                derivedClasses = memberValue.__subclasses__()
-                if len(derivedClasses) > 0:
-                    html += '<p><b>Derived classes:</b></p><ul>'
-                    for derivedClass in derivedClasses:
-                        moduleName = derivedClass.__module__
-                        className = derivedClass.__qualname__
-                        html += f'<li><a href="item:{moduleName}/{className}">{className}</a> from {moduleName}</li>'
-                    html += '</ul>'
-            except:
-                pass
+            self._displaySourceError('Could not locate source code.')
 
-        # Display the signature of callable objects.
-        try:
-            signature = str(inspect.signature(memberValue))
-            html += f'<p><b>Signature:</b> {memberValue.__name__}{signature}</p>'
-        except:
-            pass
-
-        # Display documentation for non-object types, converting from reStructuredText or markdown
-        # to HTML.
-        if memberType != 'object':
-            doc = inspect.getdoc(data['value'])
-            if doc:
-                # Check for special cases where docstrings are plain text.
-                if fullName in ['sys']:
-                    docHtml = f'<pre>{escape(doc)}</pre>'
-                else:
-                    # If we encounter improper reStructuredText markup leading to an exception
-                    # or a "problematic" span, just treat the input as markdown.
-                    try:
-                        docHtml = rstToHtml(doc)
-                        if '<span class="problematic"' in docHtml:
-                            docHtml = markdown(doc)
-                    except:
-                        docHtml = markdown(doc)
-                html += f'<hr>{docHtml}'
-    
-        self._textBrowser.setHtml(html)
+        # Once the selection settles, get ready for the next one.
+        self._prefetchTimer.start()
 
+    def _prefetchNeighbors(self) -> None:
+        '''Renders information in the background for the items most likely to be selected next: the
+        visible rows nearest the current item, and its first children (if they've been created).'''
+        index = self._treeView.currentIndex()
+        if not index.isValid():
+            return
+        index = index.sibling(index.row(), 0)
+        indexes = []
+        belowIndex = aboveIndex = index
+        for _ in range(MainWindow._prefetchRowCount):
+            belowIndex = self._treeView.indexBelow(belowIndex)
+            aboveIndex = self._treeView.indexAbove(aboveIndex)
+            indexes += [belowIndex, aboveIndex]
+        model = self._model.filteredTreeModel
+        childCount = min(model.rowCount(index), MainWindow._prefetchChildCount)
+        indexes += [model.index(row, 0, index) for row in range(childCount)]
+
+        # Gathering the details of members (such as locating the source code of classes) can take
+        # a while, so stop once the time limit is reached, nearest items first.
+        requests = {}
+        startTime = time.perf_counter()
+        for neighborIndex in indexes:
+            item = utilities.getItemFromIndex(model, neighborIndex)
+            if item is not None:
+                if item.id not in self._infoCache and item.id not in requests:
+                    requests[item.id] = self._getSnapshot(item)
+                    if time.perf_counter() - startTime > MainWindow._prefetchGatherTimeLimit:
+                        break
+        if len(requests):
+            self._infoRenderer.prefetch(list(requests.items()), MainWindow._prefetchTimeLimit)
+
+    def _getSnapshot(self, item: TreeNode) -> MemberSnapshot:
+        '''Returns a snapshot of an item for the info renderer, obtaining its member's details (and
+        its value, if necessary) on the GUI thread.'''
+        return InfoRenderer.getSnapshot(item, self._model.getMemberInfo(item))
+
+    @tracing.traced('displaySource')
     def _displaySource(self, filename: str, startLine: int = None, lineCount: int = None) -> None:
         '''Shows source code within the source text viewer.'''
         try:
-            # Read the file and populate the source text viewer.
-            with open(filename) as fp:
-                lines = fp.readlines()
-                self._sourceTextViewer.setPlainText(''.join(lines))
-
-            # Restart the Python syntax highlighter.
-            self._sourceTextHighlighter.setDocument(self._sourceTextViewer.document())
+            # Display the file, unless it's displayed already, reading and highlighting it only if it
+            # isn't cached (or has been modified since it was cached).
+            key = (filename, os.path.getmtime(filename))
+            if key != self._sourceKey:
+                entry = self._sourceCache.get(key)
+                if entry is None:
+                    entry = self._loadSourceDocument(filename)
+                    self._sourceCache.put(key, entry)
+                elif entry[1].theme != self._sourceTheme:
+                    entry[1].theme = self._sourceTheme
+                self._sourceTextViewer.setDocument(entry[0])
+                self._sourceKey = key
+                self._sourceDocument, self._sourceHighlighter = entry
 
             # If line numbers are available, highlight the lines encompassing the currently
             # selected member.
             if startLine != None:
-                cursor = QTextCursor(self._sourceTextViewer.document())
-                cursor.movePosition(QTextCursor.Start)
-                if startLine > 1:
-                    cursor.movePosition(QTextCursor.NextBlock, QTextCursor.MoveAnchor, startLine - 1)
+                # Find the blocks by number, rather than moving the cursor block by block, which
+                # takes a while in large files.
+                document = self._sourceTextViewer.document()
+                startBlock = document.findBlockByNumber(max(startLine - 1, 0))
+                cursor = QTextCursor(startBlock if startBlock.isValid() else document.lastBlock())
                 self._sourceTextViewer.setTextCursor(cursor)
-                cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor, lineCount)
+                endBlock = document.findBlockByNumber(max(startLine - 1, 0) + lineCount)
+                if endBlock.isValid():
+                    cursor.setPosition(endBlock.position(), QTextCursor.KeepAnchor)
+                else:
+                    cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
                 lineColor = QColor(255, 255, 0, 48)
                 extraSelection = QTextEdit.ExtraSelection()
                 extraSelection.format.setBackground(lineColor)
@@ -355,14 +442,53 @@ class MainWindow(QMainWindow):
                 self._sourceTextViewer.centerCursor()
             else:
                 self._sourceTextViewer.setExtraSelections([])
+            self._highlightVisibleSource()
         except:
             self._displaySourceError('Could not open file.')
 
+    def _sourceTextViewerUpdateRequested(self, rect: QRect, dy: int) -> None:
+        self._highlightVisibleSource()
+
+    def _highlightVisibleSource(self) -> None:
+        '''Makes sure that the visible lines of a large source file (and a page of lines above and
+        below them) have been highlighted, since large files are highlighted incrementally.'''
+        if self._sourceHighlighter is not None:
+            firstBlockNumber = self._sourceTextViewer.firstVisibleBlock().blockNumber()
+            lineHeight = self._sourceTextViewer.fontMetrics().lineSpacing()
+            pageLineCount = self._sourceTextViewer.viewport().height() // lineHeight + 1
+            self._sourceHighlighter.highlightBlocks(firstBlockNumber - pageLineCount,
+                firstBlockNumber + 2 * pageLineCount)
+
     def _displaySourceError(self, errorMessage: str) -> None:
         '''Displays an error message within the source text viewer.'''
-        self._sourceTextViewer.setPlainText(errorMessage)
+        self._sourceErrorDocument.setPlainText(errorMessage)
+        self._sourceTextViewer.setDocument(self._sourceErrorDocument)
         self._sourceTextViewer.setExtraSelections([])
-        self._sourceTextHighlighter.setDocument(None)
+        self._sourceKey = None
+        self._sourceDocument = None
+        self._sourceHighlighter = None
+
+    def _createSourceDocument(self) -> QTextDocument:
+        '''Returns a new, empty document suitable for the source text viewer.'''
+        document = QTextDocument()
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        document.setDefaultFont(self._sourceTextViewer.font())
+        document.setUndoRedoEnabled(False)
+        return document
+
+    def _loadSourceDocument(self, filename: str) -> tuple:
+        '''Reads a source file into a new document with a syntax highlighter for the current theme,
+        returning both.'''
+        with open(filename) as fp:
+            text = fp.read()
+
+        # Attach the highlighter before setting the text, so the text is highlighted just once (or,
+        # for large files, incrementally).
+        document = self._createSourceDocument()
+        highlighter = PythonSyntaxHighlighter(document)
+        highlighter.theme = self._sourceTheme
+        highlighter.setPlainText(text)
+        return document, highlighter
 
     def _linkClicked(self, url: QUrl) -> None:
         scheme = url.scheme()
@@ -376,18 +502,57 @@ class MainWindow(QMainWindow):
             # Clear the search and select the item (if present in the tree).
             self._searchEdit.clear()
             self._model.searchText = ''
-            index = self._model.findItemById(url.path())
+            id = url.path()
+            index = self._model.findItemById(id)
             if index.isValid():
                 self._treeView.setCurrentIndex(index)
+            elif self._model.containsItem(id):
+                self.statusBar().showMessage(f'{id} is hidden. Include private or inherited members to show it.', 5000)
+
+    def _traceActionToggled(self, checked: bool) -> None:
+        '''Starts or stops tracing, showing the time taken by each operation while tracing.'''
+        tracing.setEnabled(checked)
+        self._traceLabel.setVisible(checked)
+        self._traceLabel.clear()
+
+    def _exportTraceActionTriggered(self) -> None:
+        '''Saves the traced operations to a file that can be viewed in chrome://tracing.'''
+        filename, _ = QFileDialog.getSaveFileName(self, 'Export Trace', 'pyspector-trace.json',
+            'Trace files (*.json)')
+        if filename:
+            try:
+                tracing.exportChromeTrace(filename)
+            except:
+                self.statusBar().showMessage(f'Could not save the trace to {filename}.', 5000)
+
+    def _spanEnded(self, name: str, detail: str, duration: float) -> None:
+        '''Shows the time taken by an operation on the main thread.'''
+        if threading.current_thread() is threading.main_thread():
+            description = f'{name} ({detail})' if detail else name
+            self._traceLabel.setText(f'{description}: {duration * 1000:.1f} ms')
 
     def _selectModulesButtonClicked(self) -> None:
-        self._moduleSelectionDialog = ModuleSelectionDialog(self, self._config.moduleNames)
+        cacheFilename = f'{self._config.directory}/modules.json'
+        self._moduleSelectionDialog = ModuleSelectionDialog(self, self._config.moduleNames, cacheFilename)
         self._moduleSelectionDialog.finished.connect(self._moduleSelectionDialogFinished)
         self._moduleSelectionDialog.open()
 
+    def _moduleLoadingFinished(self, moduleName: str) -> None:
+        '''Removes the progress indicator for a module, and selects the first match in it (if any).'''
+        self._moduleLoadingPanel.removeModule(moduleName)
+        if len(self._model.searchText) and not self._treeView.selectedIndexes():
+            self._selectFirstMatch()
+
+    def _discardCachedInfo(self, moduleName: str) -> None:
+        '''Discards the cached information for a module's members, when the module is (re)loaded.'''
+        self._infoCache.discardWhere(lambda key: key == moduleName or key.startswith(moduleName + '/'))
+
     def _moduleSelectionDialogFinished(self, result: int) -> None:
         if result == ModuleSelectionDialog.Accepted:
             moduleNames = self._moduleSelectionDialog.selectedModuleNames
             self._model.setModuleNames(moduleNames)
             self._config.moduleNames = moduleNames
-            self._selectFirstMatch()
+
+            # Leave the expanded items and selection alone, unless there's a search in progress.
+            if len(self._model.searchText):
+                self._selectFirstMatch()
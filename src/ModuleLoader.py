@@ -0,0 +1,188 @@
+# External imports:
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import queue
+import threading
+from PyQt5.QtCore import pyqtSignal, QObject
+
+# Local imports:
+import inspection
+from inspection import MemberData
+import tracing
+
+class ModuleLoader(QObject):
+    '''
+    Imports and inspects modules on a background thread.
+
+    With the 'thread' engine, modules are imported and inspected one at a time on the background
+    thread, in the order requested. With the 'process' engine, the background thread hands each
+    module to a separate worker process, running as many processes at once as there are CPU cores
+    (but at least two, so that one slow module doesn't hold up the rest). A module that crashes or
+    hangs its worker process is reported with an error instead of taking down the application, but
+    the members of modules inspected this way have no values (just their details).
+
+    If a cache is provided, modules that haven't changed since they were last inspected are loaded
+    from the cache instead of being imported, and the members of newly inspected modules are saved
+    in the cache (unless lazy loading leaves them incomplete).
+
+    Signals are emitted from the background thread, so connected slots run on the thread of the
+    receiving object.
+    '''
+
+    # Emitted with the module name, the number of members inspected, and the total number of members.
+    moduleProgress = pyqtSignal(str, int, int)
+
+    # Emitted with the module name and its MemberData once the module has been inspected.
+    moduleLoaded = pyqtSignal(str, object)
+
+    # The names of the available inspection engines.
+    engines = ('thread', 'process')
+
+    # The number of seconds a worker process may spend importing a module before it is terminated.
+    importTimeout = 60
+
+    def __init__(self, parent: QObject = None):
+        '''Initializes a ModuleLoader instance.'''
+        super().__init__(parent)
+        self.lazyLoading = False
+        self.engine = 'thread'
+        self.cache = None
+        self._queue = queue.Queue()
+        self._cancelledModuleNames = set()
+        self._lock = threading.Lock()
+
+        # Use a daemon thread, so that an import that never finishes can't prevent the application
+        # from exiting.
+        self._thread = threading.Thread(target = self._run, name = type(self).__name__, daemon = True)
+        self._thread.start()
+
+    def load(self, moduleName: str) -> None:
+        '''Adds a module to the queue of modules to load.'''
+        with self._lock:
+            self._cancelledModuleNames.discard(moduleName)
+        self._queue.put((moduleName, self.lazyLoading, self.engine))
+
+    def cancel(self, moduleName: str) -> None:
+        '''Stops loading a module. No further signals are emitted for the module.'''
+        with self._lock:
+            self._cancelledModuleNames.add(moduleName)
+
+    def _isCancelled(self, moduleName: str) -> bool:
+        with self._lock:
+            return moduleName in self._cancelledModuleNames
+
+    def _run(self) -> None:
+        '''Loads queued modules until the application exits.'''
+        # Worker processes are spawned rather than forked, since forking a process that's running Qt
+        # threads isn't safe.
+        context = multiprocessing.get_context('spawn')
+        maxJobCount = max(2, os.cpu_count() or 1)
+        jobs = []
+        while True:
+            # Wait for more work when there's nothing running, otherwise just check for it.
+            try:
+                moduleName, lazy, engine = self._queue.get(block = len(jobs) == 0, timeout = None)
+            except queue.Empty:
+                moduleName = None
+
+            # Report a module that fails in an unexpected way with an error, rather than letting the
+            # exception stop the loading of every module after it.
+            try:
+                if moduleName is None or self._isCancelled(moduleName):
+                    pass
+                elif self._loadFromCache(moduleName):
+                    pass
+                elif engine == 'process':
+                    jobs.append(inspection.ProcessJob(context, moduleName))
+                else:
+                    self._loadInThread(moduleName, lazy)
+            except Exception as exception:
+                self._reportError(moduleName, f'Could not load module ({exception}).')
+
+            # Service worker processes until one of them finishes or another module is queued.
+            while len(jobs) and (len(jobs) >= maxJobCount or self._queue.empty()):
+                jobs = self._serviceJobs(jobs)
+
+    @tracing.traced('loadFromCache')
+    def _loadFromCache(self, moduleName: str) -> bool:
+        '''Loads a module from the cache, if possible, returning whether it succeeded.'''
+        moduleData = self.cache.load(moduleName) if self.cache else None
+        if moduleData is None:
+            return False
+        self.moduleLoaded.emit(moduleName, moduleData)
+        return True
+
+    def _saveToCache(self, moduleName: str, moduleData: MemberData) -> None:
+        '''Saves a successfully inspected module to the cache.'''
+        if self.cache and not moduleData.error:
+            self.cache.save(moduleName, moduleData)
+
+    def _loadInThread(self, moduleName: str, lazy: bool) -> None:
+        '''Imports and inspects a module on the current thread.'''
+        progress = lambda count, total: self.moduleProgress.emit(moduleName, count, total)
+        isCancelled = lambda: self._isCancelled(moduleName)
+        try:
+            moduleData = inspection.inspectModule(moduleName, lazy, progress, isCancelled)
+        except inspection.InspectionCancelled:
+            return
+        except Exception as exception:
+            # The module was imported, but inspecting its members failed (for instance, because a
+            # module __getattr__ raised something other than AttributeError).
+            moduleData = MemberData(moduleName, moduleName, 'module', None,
+                error = f'Could not inspect module ({exception}).')
+
+        # The module may have been cancelled while it was being imported.
+        if not self._isCancelled(moduleName):
+            self.moduleLoaded.emit(moduleName, moduleData)
+            if not lazy:
+                self._saveToCache(moduleName, moduleData)
+
+    def _reportError(self, moduleName: str, error: str) -> None:
+        '''Reports a module that couldn't be loaded, unless it has been cancelled.'''
+        if not self._isCancelled(moduleName):
+            self.moduleLoaded.emit(moduleName, MemberData(moduleName, moduleName, 'module', None,
+                error = error))
+
+    def _serviceJobs(self, jobs: list) -> list:
+        '''Handles messages from worker processes, returning the jobs that are still running.'''
+        waitables = [job.connection for job in jobs] + [job.process.sentinel for job in jobs]
+        wait(waitables, timeout = 0.1)
+
+        runningJobs = []
+        for job in jobs:
+            try:
+                if self._serviceJob(job):
+                    runningJobs.append(job)
+            except Exception as exception:
+                job.terminate()
+                self._reportError(job.moduleName, f'Could not load module ({exception}).')
+        return runningJobs
+
+    def _serviceJob(self, job: inspection.ProcessJob) -> bool:
+        '''Handles messages from a worker process, returning whether it's still running.'''
+        moduleName = job.moduleName
+        moduleData = None
+        if self._isCancelled(moduleName):
+            job.terminate()
+            return False
+
+        # Read all available messages.
+        for message in job.receive():
+            if message[0] == 'progress':
+                self.moduleProgress.emit(moduleName, message[1], message[2])
+            elif message[0] == 'loaded':
+                moduleData = message[1]
+                self._saveToCache(moduleName, moduleData)
+
+        # Report the result, or an error if the process has died or is taking too long to import
+        # the module.
+        error = job.getError(ModuleLoader.importTimeout) if moduleData is None else None
+        if error:
+            moduleData = MemberData(moduleName, moduleName, 'module', None, error = error)
+        if moduleData is None:
+            return True
+        job.terminate()
+        if not self._isCancelled(moduleName):
+            self.moduleLoaded.emit(moduleName, moduleData)
+        return False
@@ -0,0 +1,58 @@
+# External imports:
+from PyQt5.QtCore import pyqtSignal, QObject
+from PyQt5.QtWidgets import QGridLayout, QLabel, QProgressBar, QPushButton, QWidget
+
+class ModuleLoadingPanel(QWidget):
+    '''Displays a progress bar and a cancel button for each module being loaded.'''
+
+    # Emitted with the module name when the user presses a cancel button.
+    cancelRequested = pyqtSignal(str)
+
+    def __init__(self, parent: QObject = None):
+        '''Initializes a ModuleLoadingPanel instance.'''
+        super().__init__(parent)
+        self._rows = {}
+        self._layout = QGridLayout()
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._layout.setColumnStretch(1, 1)
+        self.setLayout(self._layout)
+        self.hide()
+
+    def addModule(self, moduleName: str) -> None:
+        '''Adds a row for a module that has started loading.'''
+        if moduleName in self._rows:
+            return
+
+        label = QLabel()
+        label.setText(moduleName)
+
+        # Show a busy indicator until the number of members is known.
+        progressBar = QProgressBar()
+        progressBar.setRange(0, 0)
+
+        cancelButton = QPushButton()
+        cancelButton.setText('Cancel')
+        cancelButton.clicked.connect(lambda: self.cancelRequested.emit(moduleName))
+
+        row = self._layout.rowCount()
+        self._layout.addWidget(label, row, 0)
+        self._layout.addWidget(progressBar, row, 1)
+        self._layout.addWidget(cancelButton, row, 2)
+        self._rows[moduleName] = (label, progressBar, cancelButton)
+        self.show()
+
+    def setProgress(self, moduleName: str, count: int, total: int) -> None:
+        '''Updates the progress bar for a module.'''
+        if moduleName in self._rows:
+            _, progressBar, _ = self._rows[moduleName]
+            progressBar.setRange(0, total)
+            progressBar.setValue(count)
+
+    def removeModule(self, moduleName: str) -> None:
+        '''Removes the row for a module that has finished loading.'''
+        widgets = self._rows.pop(moduleName, ())
+        for widget in widgets:
+            self._layout.removeWidget(widget)
+            widget.deleteLater()
+        if not self._rows:
+            self.hide()
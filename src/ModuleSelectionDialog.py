@@ -14,12 +14,13 @@ class ModuleSelectionDialog(QDialog):
 
     _moduleSelectionModel = None
 
-    def __init__(self, parent, selectedModuleNames):
+    def __init__(self, parent, selectedModuleNames, cacheFilename: str = None):
         '''Initializes a ModuleSelectionModel instance.'''
         super().__init__(parent)
         self.setWindowModality(Qt.ApplicationModal)
 
         self._selectedModuleNames = selectedModuleNames
+        self._cacheFilename = cacheFilename
         self._createModel()
 
         label = QLabel()
@@ -62,10 +63,10 @@ class ModuleSelectionDialog(QDialog):
     def _createModel(self):
         '''Creates the hierarchical model of items to display.'''
         # Create a cached hierarchy of all available modules, if we haven't already.
-        # TODO: This time-consuming operation blocks the UI. Can we do it in the background,
-        # or at least show a spinner while the work is being done?
+        # This scans the file system without importing anything, and rescans only directories that
+        # have changed since the last session, so it's quick enough to do on the UI thread.
         if ModuleSelectionDialog._moduleSelectionModel == None:
-            ModuleSelectionDialog._moduleSelectionModel = ModuleSelectionModel()
+            ModuleSelectionDialog._moduleSelectionModel = ModuleSelectionModel(self._cacheFilename)
 
         # Build the corresponding tree of Qt standard items.
         self._model = QStandardItemModel()
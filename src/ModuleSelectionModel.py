@@ -1,4 +1,7 @@
 # External imports:
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
 import pkgutil
 import sys
 
@@ -16,33 +19,140 @@ class ModuleSelectionModel:
     Represents a hierarchical list of all available modules.
 
     Includes built-in modules as well as modules available to import from the system path.
+
+    Modules are discovered by scanning the file system (or zip archives) on the system path, rather
+    than by importing packages, so no package code runs. Each entry on the system path is scanned in
+    parallel. If a cache filename is provided, the modules found in each directory are saved in that
+    file, and later only directories whose modification times have changed are scanned again.
     '''
 
-    def __init__(self):
+    # Increment this when the format of the cache file changes.
+    _cacheVersion = 2
+
+    def __init__(self, cacheFilename: str = None):
         '''Initializes a ModuleSelectionModel instance.'''
-        # Create root node.
+        self._cacheFilename = cacheFilename
+        self._loadCache()
+
+        # Create root node, and a dictionary for finding module data by name.
         self._rootModuleData = ModuleData('root', None)
+        self._moduleDataByName = {}
 
         # Include all built-in modules.
         for moduleName in sys.builtin_module_names:
             self._addModule(self._rootModuleData, moduleName, 'built-in')
 
-        # Walk all available modules.
-        for moduleInfo in pkgutil.walk_packages(onerror = self._handleError):
-            location = ''
-            if hasattr(moduleInfo.module_finder, 'path'):
-                location = moduleInfo.module_finder.path
-            parentData = self._findParentData(moduleInfo.name)
-            self._addModule(parentData, moduleInfo.name, location)
+        # Scan all the paths in parallel, then add the modules found in order, so that modules found
+        # on earlier paths take precedence.
+        with ThreadPoolExecutor() as executor:
+            scannedPaths = list(executor.map(lambda path: self._scanPath(path, ''), sys.path))
+        moduleNames = set()
+        for scannedModules in scannedPaths:
+            for moduleName, location, submodules in scannedModules:
+                if moduleName not in moduleNames:
+                    moduleNames.add(moduleName)
+                    self._addScannedModule(moduleName, location, submodules)
+
+        self._saveCache()
 
     @property
     def allModules(self):
         '''The list of root-level module data.'''
         return self._rootModuleData.children
 
-    def _handleError(self, packageName: str):
-        '''Ignores any errors encountered while importing a package.'''
-        pass
+    def _scanPath(self, path: str, prefix: str) -> list:
+        '''
+        Recursively finds the modules on the given path, returning a list of (name, location,
+        submodules) tuples, where submodules is a list of the same form.
+        '''
+        location, modules = self._listModules(path)
+        scannedModules = []
+        for name, isPackage in modules:
+            moduleName = prefix + name
+            submodules = self._scanPath(os.path.join(path, name), moduleName + '.') if isPackage else []
+            scannedModules.append((moduleName, location, submodules))
+        return scannedModules
+
+    def _addScannedModule(self, moduleName: str, location: str, submodules: list) -> None:
+        '''Adds module data for a module found by _scanPath, and for its submodules.'''
+        parentData = self._findParentData(moduleName)
+        self._addModule(parentData, moduleName, location)
+        for submoduleName, submoduleLocation, subsubmodules in submodules:
+            self._addScannedModule(submoduleName, submoduleLocation, subsubmodules)
+
+    def _listModules(self, path: str) -> tuple:
+        '''
+        Returns the location of the given path, and a list of (name, isPackage) tuples for the
+        modules found there.
+        '''
+        modificationTime = self._getModificationTime(path)
+        if modificationTime is None:
+            return '', []
+
+        # Use the cached list if the path hasn't been modified since it was scanned.
+        cachedEntry = self._cachedDirectories.get(path)
+        if cachedEntry and cachedEntry['modificationTime'] == modificationTime:
+            self._directories[path] = cachedEntry
+            return cachedEntry['location'], cachedEntry['modules']
+
+        location = ''
+        modules = []
+        importer = pkgutil.get_importer(path)
+        if importer is not None:
+            location = getattr(importer, 'path', '')
+            modules = [(moduleInfo.name, moduleInfo.ispkg) for moduleInfo in pkgutil.iter_modules([path])]
+        self._directories[path] = {
+            'modificationTime': modificationTime,
+            'location': location,
+            'modules': modules,
+        }
+        return location, modules
+
+    @staticmethod
+    def _getModificationTime(path: str) -> int:
+        '''
+        Returns the modification time of a path, in nanoseconds, or None if it doesn't exist.
+
+        Packages within zip archives (such as eggs) have paths within the archive, which can't be
+        checked with os.stat, so the modification time of the archive is used for them.
+        '''
+        while True:
+            try:
+                return os.stat(path or '.').st_mtime_ns
+            except OSError:
+                parentPath = os.path.dirname(path)
+                if parentPath == path or os.path.isdir(parentPath):
+                    return None
+                path = parentPath
+
+    def _loadCache(self) -> None:
+        '''Tries to load cached modules. Errors are silently ignored.'''
+        self._cachedDirectories = {}
+        self._directories = {}
+        if self._cacheFilename is None:
+            return
+        try:
+            with open(self._cacheFilename) as fp:
+                cache = json.load(fp)
+            if cache['version'] == ModuleSelectionModel._cacheVersion and cache['python'] == sys.version:
+                self._cachedDirectories = cache['directories']
+        except:
+            pass
+
+    def _saveCache(self) -> None:
+        '''Tries to save the modules found. Errors are silently ignored.'''
+        if self._cacheFilename is None:
+            return
+        cache = {
+            'version': ModuleSelectionModel._cacheVersion,
+            'python': sys.version,
+            'directories': self._directories,
+        }
+        try:
+            with open(self._cacheFilename, 'w') as fp:
+                json.dump(cache, fp)
+        except:
+            pass
 
     def _findParentData(self, moduleName: str) -> ModuleData:
         '''Determines the module data to use as a parent for the given module name.'''
@@ -51,17 +161,16 @@ class ModuleSelectionModel:
         name = None
         for part in parts:
             name = part if name == None else f'{name}.{part}'
-            data = self._findData(parentData, name)
+            data = self._moduleDataByName.get(name)
             if data == None:
                 break
             parentData = data
         return parentData
 
-    def _findData(self, parentData: ModuleData, name: str) -> ModuleData:
-        '''Returns the first child of parentData that has the given name, or None.'''
-        return next((childData for childData in parentData.children if childData.name == name), None)
-
     def _addModule(self, parentData: ModuleData, name: str, location: str) -> None:
         '''Appends module data to the specified parent.'''
         moduleData = ModuleData(name, location)
         parentData.children.append(moduleData)
+
+        # If there are several modules with the same name, the first one is found.
+        self._moduleDataByName.setdefault(name, moduleData)
@@ -0,0 +1,110 @@
+# External imports:
+from functools import reduce
+
+class NameIndex:
+    '''
+    An index of item names, used to find the IDs of items whose names contain some search text.
+
+    Each distinct name is indexed by the casefolded character sequences (of one to three characters)
+    it contains, so a search only examines the names that contain every such sequence of the search
+    text, rather than every item in the tree.
+    '''
+
+    # The length of the longest character sequences indexed.
+    _gramLength = 3
+
+    def __init__(self):
+        '''Initializes a NameIndex instance.'''
+        self._idsByName = {}
+        self._namesByFoldedName = {}
+        self._foldedNamesByGram = {}
+        self._entriesByModule = {}
+
+    def add(self, id: str, name: str) -> None:
+        '''Adds an item with the given ID and name.'''
+        moduleName = id.split('/', 1)[0]
+        self._entriesByModule.setdefault(moduleName, []).append((id, name))
+
+        ids = self._idsByName.get(name)
+        if ids is not None:
+            ids.add(id)
+            return
+        self._idsByName[name] = { id }
+
+        foldedName = name.casefold()
+        names = self._namesByFoldedName.get(foldedName)
+        if names is not None:
+            names.add(name)
+            return
+        self._namesByFoldedName[foldedName] = { name }
+        for gram in NameIndex._getGrams(foldedName):
+            self._foldedNamesByGram.setdefault(gram, set()).add(foldedName)
+
+    def removeModule(self, moduleName: str) -> None:
+        '''Removes all the items belonging to a module.'''
+        for id, name in self._entriesByModule.pop(moduleName, []):
+            ids = self._idsByName[name]
+            ids.discard(id)
+            if ids:
+                continue
+            del self._idsByName[name]
+
+            foldedName = name.casefold()
+            names = self._namesByFoldedName[foldedName]
+            names.discard(name)
+            if names:
+                continue
+            del self._namesByFoldedName[foldedName]
+            for gram in NameIndex._getGrams(foldedName):
+                foldedNames = self._foldedNamesByGram[gram]
+                foldedNames.discard(foldedName)
+                if not foldedNames:
+                    del self._foldedNamesByGram[gram]
+
+    def find(self, text: str, matchCase: bool, exact: bool = False) -> set:
+        '''Returns the IDs of the items whose names contain (or, if exact is true, equal) the text.'''
+        foldedText = text.casefold()
+        if exact:
+            foldedNames = [foldedText] if foldedText in self._namesByFoldedName else []
+        else:
+            foldedNames = [foldedName for foldedName in self._findCandidates(foldedText)
+                if foldedText in foldedName]
+
+        ids = set()
+        for foldedName in foldedNames:
+            for name in self._namesByFoldedName[foldedName]:
+                if not matchCase or (name == text if exact else text in name):
+                    ids.update(self._idsByName[name])
+        return ids
+
+    @staticmethod
+    def getAncestorIds(ids: set) -> set:
+        '''Returns the IDs of all the ancestors of the items with the given IDs.'''
+        ancestorIds = set()
+        for id in ids:
+            end = id.rfind('/')
+            while end > 0:
+                ancestorId = id[:end]
+                if ancestorId in ancestorIds:
+                    break
+                ancestorIds.add(ancestorId)
+                end = id.rfind('/', 0, end)
+        return ancestorIds
+
+    def _findCandidates(self, foldedText: str) -> set:
+        '''Returns the casefolded names that contain every indexed sequence of the given text.'''
+        if len(foldedText) == 0:
+            return set(self._namesByFoldedName)
+        gramLength = min(len(foldedText), NameIndex._gramLength)
+        grams = { foldedText[i:i + gramLength] for i in range(len(foldedText) - gramLength + 1) }
+        candidateSets = [self._foldedNamesByGram.get(gram, set()) for gram in grams]
+
+        # Intersect the smallest sets first.
+        candidateSets.sort(key = len)
+        return reduce(set.intersection, candidateSets[1:], set(candidateSets[0]))
+
+    @staticmethod
+    def _getGrams(foldedName: str) -> set:
+        '''Returns the sequences of one to three characters contained in a casefolded name.'''
+        return { foldedName[i:i + length] for length in range(1, NameIndex._gramLength + 1)
+            for i in range(len(foldedName) - length + 1) }
@@ -7,8 +7,12 @@ from enum import Enum
 import re
 import sys
 import keyword
+from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QBrush, QColor, QFont, QSyntaxHighlighter, QTextCharFormat
 
+# Local imports:
+import tracing
+
 def format(colorName: str, style: str = '') -> QTextCharFormat:
     '''Return a QTextCharFormat with the given attributes.'''
     charFormat = QTextCharFormat()
@@ -50,7 +54,29 @@ class Theme(Enum):
     DARK = 1
 
 class PythonSyntaxHighlighter(QSyntaxHighlighter):
-    '''A syntax highlighter for the Python language.'''
+    '''
+    A syntax highlighter for the Python language.
+
+    Each line is scanned with a single regular expression made of one named group per role, so the
+    role of each match is identified by the name of the group that matched (its lastgroup). The
+    regular expressions are compiled once, when the first instance is created, and shared by all
+    instances.
+
+    The tokens found in each block are kept, along with the hash of its text and the state of the
+    previous block, so changing the theme only formats them again, rather than scanning all the
+    text again. Tokens are stored as a flat tuple of (start, length, role) triples, in the order
+    their formats are applied, which takes much less memory than a tuple per token.
+
+    Text set with setPlainText is highlighted incrementally if it has many lines: the state of each
+    block (whether it ends within an unclosed string) is determined up front, so that any block can
+    be highlighted independently. Blocks passed to highlightBlocks are highlighted right away, and
+    the rest a chunk at a time whenever the application is idle.
+    '''
+
+    # The minimum number of lines in text that's highlighted incrementally, and the number of
+    # lines highlighted in each chunk while idle.
+    incrementalLineCount = 5000
+    _chunkLineCount = 500
 
     # Python operators:
     _operators = [
@@ -75,17 +101,40 @@ class PythonSyntaxHighlighter(QSyntaxHighlighter):
         '\\', "'", '"', 'a', 'b', 'f', 'n', 'r', 't', 'v',
     ]
 
+    # Regular expressions shared by all instances (see _compilePatterns).
+    _code = None
+    _subpatterns = None
+    _formattedReplacementSubpattern = None
+
     def __init__(self, document):
         '''Initializes a PythonSyntaxHighlighter instance.'''
         super().__init__(document)
+        if PythonSyntaxHighlighter._code is None:
+            PythonSyntaxHighlighter._compilePatterns()
 
         self._theme = Theme.DARK
-
+        self._formats = self._getFormats(self._theme)
+
+        # For each block number, a tuple of the state of the previous block, the hash of the text,
+        # the tokens found in the text, and the state of the block (or None, if the block hasn't
+        # been highlighted yet).
+        self._blockTokens = []
+
+        # For incremental highlighting, whether each block has been highlighted (or None when all
+        # blocks have been), and a timer for highlighting the rest when idle.
+        self._highlightedBlocks = None
+        self._nextChunkBlockNumber = 0
+        self._chunkTimer = QTimer(self)
+        self._chunkTimer.timeout.connect(self._highlightNextChunk)
+
+    @classmethod
+    def _compilePatterns(cls) -> None:
+        '''Compiles the regular expressions used to highlight code.'''
         # Create a pattern that matches a comment (from '#' until the end of the line), and a
         # subpattern for common labels used within comments.
-        comment = self._makeNamedGroup('comment', rf'#.*')
+        comment = cls._makeNamedGroup('comment', rf'#.*')
         todoLabels = ['TODO', 'BUG', 'FIXME', 'HACK', 'NOTE', 'XXX']
-        todo = self._makeNamedAlternatives('todo', [rf'\b{label}\b' for label in todoLabels])
+        todo = cls._makeNamedAlternatives('todo', [rf'\b{label}\b' for label in todoLabels])
 
         # Create patterns that match escape sequences within strings.
         escapePatterns = [r'\\' + re.escape(char)
@@ -96,30 +145,30 @@ class PythonSyntaxHighlighter(QSyntaxHighlighter):
             r'\\u[0-9A-Fa-f]{4}',
             r'\\U[0-9A-Fa-f]{8}',
         ]
-        escapeSequence = self._makeNamedAlternatives('escapeSequence', escapePatterns)
+        escapeSequence = cls._makeNamedAlternatives('escapeSequence', escapePatterns)
 
         # Create a pattern for formatted replacements within strings.
         # NOTE: This pattern isn't strictly correct; it should match balanced pairs of curly braces.
-        formattedReplacementPattern = self._makeNamedGroup('formattedReplacement', r'\{.*?\}')
+        formattedReplacementPattern = cls._makeNamedGroup('formattedReplacement', r'\{.*?\}')
         formattedReplacement = r'\{\{|\}\}|' + formattedReplacementPattern
 
         # Create patterns for string (and bytes) literals, possibly containing escape sequences.
         # Bytes literals are prefixed by 'b', formatted string or bytes literals by 'f', and
         # backward-compatible Unicode string literals by 'u' (lower- or uppercase).
-        stringOrBytesPrefix = self._makeNamedGroup('stringOrBytesPrefix', r'[BbFfUu]?')
-        stringStart = self._makeNamedAlternatives('stringStart', ["'''", '"""', "'", '"'])
-        stringEnd = self._makeNamedAlternatives('stringEnd', [r'(?P=stringStart)', r'\\?$'])
+        stringOrBytesPrefix = cls._makeNamedGroup('stringOrBytesPrefix', r'[BbFfUu]?')
+        stringStart = cls._makeNamedAlternatives('stringStart', ["'''", '"""', "'", '"'])
+        stringEnd = cls._makeNamedAlternatives('stringEnd', [r'(?P=stringStart)', r'\\?$'])
         stringPattern = rf'{stringOrBytesPrefix}{stringStart}[^\\]*?(?:\\.[^\\]*?)*?{stringEnd}'
-        string = self._makeNamedGroup('string', stringPattern)
+        string = cls._makeNamedGroup('string', stringPattern)
 
         # Create patterns for raw string (and bytes) literals, with no escape sequences.
         # Raw bytes literals are prefixed by 'rb', raw string literals by 'r', and raw formatted
         # string literals by 'rf' (lower- or uppercase, any order).
-        rawStringOrBytesPrefix = self._makeNamedGroup('rawStringOrBytesPrefix', r'[Rr][BbFf]?|[BbFf][Rr]')
-        rawStringStart = self._makeNamedAlternatives('rawStringStart', ["'''", '"""', "'", '"'])
-        rawStringEnd = self._makeNamedAlternatives('rawStringEnd', [r'(?P=rawStringStart)', r'\\?$'])
+        rawStringOrBytesPrefix = cls._makeNamedGroup('rawStringOrBytesPrefix', r'[Rr][BbFf]?|[BbFf][Rr]')
+        rawStringStart = cls._makeNamedAlternatives('rawStringStart', ["'''", '"""', "'", '"'])
+        rawStringEnd = cls._makeNamedAlternatives('rawStringEnd', [r'(?P=rawStringStart)', r'\\?$'])
         rawStringPattern = rf'{rawStringOrBytesPrefix}{rawStringStart}[^\\]*?(?:\\.[^\\]*?)*?{rawStringEnd}'
-        rawString = self._makeNamedGroup('rawString', rawStringPattern)
+        rawString = cls._makeNamedGroup('rawString', rawStringPattern)
 
         # Create patterns that match numbers.
         # NOTE: Match floats before decimal numbers, otherwise "7.e-3" only matches partially.
@@ -136,108 +185,249 @@ class PythonSyntaxHighlighter(QSyntaxHighlighter):
         octalNumber = r'\b0[oO](?:_?[0-7])+\b'
         decimalNumber = r'\b[1-9](?:_?[0-9])*\b|\b0+(?:_?0)*\b'
         hexadecimalNumber = r'\b0[xX](?:_?[0-9A-Fa-f])+\b'
-        number = self._makeNamedAlternatives('number',
+        # Every number starts with a digit or a dot; checking for one first saves trying each
+        # alternative at every position.
+        numberAlternatives = cls._makeUnnamedAlternatives('number',
             [floatOrImaginaryNumber, binaryNumber, octalNumber, decimalNumber, hexadecimalNumber])
+        number = cls._makeNamedGroup('number', rf'(?=[0-9.]){numberAlternatives}')
 
         # Create a pattern that matches a class or function definition.
-        identifier = self._makeNamedGroup('identifier', r'\w+')
-        definition = self._makeNamedGroup('definition', rf'\b(?:class|def)\b\s*{identifier}')
+        identifier = cls._makeNamedGroup('identifier', r'\w+')
+        definition = cls._makeNamedGroup('definition', rf'\b(?:class|def)\b\s*{identifier}')
 
         # Create patterns that match keywords, operators, and braces.
-        keywords = self._makeNamedAlternatives('keyword',
+        keywords = cls._makeNamedAlternatives('keyword',
             [rf'\b{word}\b' for word in keyword.kwlist])
-        operators = self._makeNamedAlternatives('operator',
+        operators = cls._makeNamedAlternatives('operator',
             [re.escape(op) for op in PythonSyntaxHighlighter._operators])
-        braces = self._makeNamedAlternatives('brace',
+        braces = cls._makeNamedAlternatives('brace',
             [re.escape(brace) for brace in PythonSyntaxHighlighter._braces])
 
         # Create a pattern that matches a decorator ('@' followed by an identifier).
-        decorator = self._makeNamedGroup('decorator', r'@[\w.]+\b')
+        decorator = cls._makeNamedGroup('decorator', r'@[\w.]+\b')
 
         # Create a pattern for 'self' and 'cls' variables (not keywords, but common conventions).
-        selfOrCls = self._makeNamedAlternatives('self', [r'\bself\b', r'\bcls\b'])
+        selfOrCls = cls._makeNamedAlternatives('self', [r'\bself\b', r'\bcls\b'])
+
+        # Create an unnamed pattern for text that's never highlighted: whitespace, and words without
+        # digits that match no other pattern and aren't followed by a quote (which would make their
+        # last letters a string prefix). No other pattern can match within such text, so skipping
+        # it just saves trying every other pattern at each of its positions.
+        plainText = r'''[^\W\d]+(?=[^\w'"]|$)|\s+'''
 
-        # Combine all the top-level patterns into one regular expression.
-        code = self._makeNamedAlternatives('code', [comment, string, rawString, number, definition,
-            keywords, operators, braces, decorator, selfOrCls])
-        self._code = re.compile(code)
+        # Combine all the top-level patterns into one regular expression. Since each top-level group
+        # encloses any groups within it, it's the last group to close when it matches, so a match's
+        # lastgroup is its role (or None, for plain text).
+        code = '|'.join([comment, string, rawString, number, definition, keywords, operators, braces,
+            decorator, selfOrCls, plainText])
+        cls._code = re.compile(code)
 
         # Create regular expressions for sub-patterns that appear only in particular contexts.
-        self._subpatterns = {
+        cls._subpatterns = {
             'comment': [(re.compile(todo), 'todo')],
             'definition': [(re.compile(definition), 'identifier')],
             'string': [(re.compile(escapeSequence), 'escapeSequence')],
         }
-        self._formattedReplacementSubpattern = re.compile(formattedReplacement)
+        cls._formattedReplacementSubpattern = re.compile(formattedReplacement)
 
     @property
     def theme(self) -> Theme:
         return self._theme
 
     @theme.setter
+    @tracing.traced('setTheme')
     def theme(self, value: Theme) -> None:
         self._theme = value
-        self.rehighlight()
-
-    def _makeNamedGroup(self, name: str, pattern: str) -> str:
+        self._formats = self._getFormats(value)
+
+        # The state of every block is known by now, so large documents can be highlighted
+        # incrementally again.
+        document = self.document()
+        if document is not None and document.blockCount() >= PythonSyntaxHighlighter.incrementalLineCount:
+            self._startIncrementalHighlighting(document.blockCount())
+        else:
+            self._chunkTimer.stop()
+            self._highlightedBlocks = None
+            self.rehighlight()
+
+    @tracing.traced('highlight')
+    def setPlainText(self, text: str) -> None:
+        '''Replaces the text of the document, highlighting it right away, or incrementally if it
+        has at least incrementalLineCount lines.'''
+        document = self.document()
+        lines = text.split('\n')
+        self._chunkTimer.stop()
+        self._highlightedBlocks = None
+        self._blockTokens = []
+        if len(lines) < PythonSyntaxHighlighter.incrementalLineCount:
+            document.setPlainText(text)
+            return
+
+        # Set the text without letting the highlighter know (so it doesn't highlight everything).
+        document.blockSignals(True)
+        document.setPlainText(text)
+        document.blockSignals(False)
+        if document.blockCount() != len(lines):
+            # The document split the text into lines differently, so just highlight everything.
+            self.rehighlight()
+            return
+
+        # Store the state at the end of each line. Lines without quotes leave the state as it is,
+        # except within formatted bytes literals (whose prefix highlightBlock doesn't recognize).
+        state = -1
+        for blockNumber, line in enumerate(lines):
+            if '"' in line or "'" in line or (state >= 0 and state & 12 == 12):
+                state = self._getLineEndState(line, state)
+            if state >= 0:
+                document.findBlockByNumber(blockNumber).setUserState(state)
+
+        self._startIncrementalHighlighting(len(lines))
+
+    def highlightBlocks(self, firstBlockNumber: int, lastBlockNumber: int) -> None:
+        '''Highlights a range of blocks right away, if they haven't been highlighted yet.'''
+        if self._highlightedBlocks is None:
+            return
+        firstBlockNumber = max(firstBlockNumber, 0)
+        lastBlockNumber = min(lastBlockNumber, len(self._highlightedBlocks) - 1)
+        while firstBlockNumber <= lastBlockNumber and self._highlightedBlocks[firstBlockNumber]:
+            firstBlockNumber += 1
+        while lastBlockNumber >= firstBlockNumber and self._highlightedBlocks[lastBlockNumber]:
+            lastBlockNumber -= 1
+        if firstBlockNumber > lastBlockNumber:
+            return
+
+        # Clear the stored state of every block but the last, so that QSyntaxHighlighter sees each
+        # state change and goes on to highlight the next block, until it reaches the last block
+        # (whose state stays the same).
+        self._highlightedBlocks[firstBlockNumber:lastBlockNumber + 1] = b'\1' * (lastBlockNumber + 1 - firstBlockNumber)
+        with tracing.span('highlightBlocks'):
+            document = self.document()
+            firstBlock = document.findBlockByNumber(firstBlockNumber)
+            block = firstBlock
+            for _ in range(firstBlockNumber, lastBlockNumber):
+                block.setUserState(-2)
+                block = block.next()
+            self.rehighlightBlock(firstBlock)
+
+    def _startIncrementalHighlighting(self, blockCount: int) -> None:
+        '''Marks every block as not highlighted yet, and starts highlighting them while idle.'''
+        self._highlightedBlocks = bytearray(blockCount)
+        self._nextChunkBlockNumber = 0
+        self._chunkTimer.start()
+
+    def _highlightNextChunk(self) -> None:
+        '''Highlights the next chunk of blocks that haven't been highlighted yet.'''
+        if self._highlightedBlocks is not None:
+            blockNumber = self._highlightedBlocks.find(0, self._nextChunkBlockNumber)
+            if blockNumber >= 0:
+                self._nextChunkBlockNumber = blockNumber + PythonSyntaxHighlighter._chunkLineCount
+                self.highlightBlocks(blockNumber, self._nextChunkBlockNumber - 1)
+                return
+        self._chunkTimer.stop()
+        self._highlightedBlocks = None
+
+    @staticmethod
+    def _getFormats(theme: Theme) -> dict:
+        '''Returns the format for each role in the given theme.'''
+        return { role: styles[theme.value] for role, styles in STYLES.items() }
+
+    @staticmethod
+    def _makeNamedGroup(name: str, pattern: str) -> str:
         '''Returns a regular expression string for a named group matching the given pattern.'''
         return f'(?P<{name}>{pattern})'
 
-    def _makeNamedAlternatives(self, name: str, alternatives: list) -> str:
+    @staticmethod
+    def _makeNamedAlternatives(name: str, alternatives: list) -> str:
         '''Returns a regular expression string for a named group matching any of the given
         alternative patterns.'''
         joinedAlternatives = '|'.join(alternatives)
-        return self._makeNamedGroup(name, joinedAlternatives)
+        return PythonSyntaxHighlighter._makeNamedGroup(name, joinedAlternatives)
 
-    def _makeUnnamedAlternatives(self, name: str, alternatives: list) -> str:
+    @staticmethod
+    def _makeUnnamedAlternatives(name: str, alternatives: list) -> str:
         '''Returns a regular expression string matching any of the given alternative patterns.'''
         joinedAlternatives = '|'.join(alternatives)
         return f'(?:{joinedAlternatives})'
 
     def highlightBlock(self, text: str) -> None:
-        '''Applies syntax highlighting to the given block of text.'''
+        '''Applies syntax highlighting to the given block of text, reusing the tokens found in it
+        previously unless it (or the state of the previous block) has changed.'''
+        previousState = self.previousBlockState()
+        textHash = hash(text)
+        blockNumber = self.currentBlock().blockNumber()
+        blockTokens = self._blockTokens
+        entry = blockTokens[blockNumber] if blockNumber < len(blockTokens) else None
+        if entry is not None and entry[0] == previousState and entry[1] == textHash:
+            _, _, tokens, state = entry
+            self.setCurrentBlockState(state)
+            formats = self._formats
+            tokenValues = iter(tokens)
+            for start, length, role in zip(tokenValues, tokenValues, tokenValues):
+                self.setFormat(start, length, formats[role])
+        else:
+            tokens, state = self._highlightTokens(text, previousState)
+            self.setCurrentBlockState(state)
+            if blockNumber >= len(blockTokens):
+                blockTokens += [None] * (blockNumber + 1 - len(blockTokens))
+            blockTokens[blockNumber] = (previousState, textHash, tokens, state)
+
+    def _highlightTokens(self, text: str, state: int) -> tuple:
+        '''Highlights the tokens found in a line of text, given the state of the previous line.
+        Returns the tokens (as a flat tuple of start, length, and role), and the block state at the
+        end of the line.'''
 
         # If the previous block state indicates that we're starting in the middle of an unclosed
         # string, prepend the appropriate quote to the current text line. Keep track of the
         # offset required when formatting text.
-        state = self.previousBlockState()
         initialQuote = self._getInitialQuoteFromBlockState(state)
         text = initialQuote + text
         offset = len(initialQuote)
 
         # Iterate over matches on the current line of text.
-        self.setCurrentBlockState(-1)
-        for match in self._code.finditer(text):
-            # See which role is played by the current match.
-            for role in STYLES.keys():
-                try:
-                    start, end = match.span(role)
-                    if start >= 0 and end > start:
-                        # We found a role for the current match. Apply the corresponding style.
-                        clampedStart = max(0, start - offset)
-                        clampedEnd = max(0, end - offset)
-                        textFormat = STYLES[role][self.theme.value]
-                        self.setFormat(clampedStart, clampedEnd - clampedStart, textFormat)
-
-                        # Now highlight any subpatterns within the span covered by this role.
-                        self._highlightSubpatterns(text, start, end, offset, role)
-
-                        # For formatted strings, also highlight the subpattern for
-                        # formatted replacements.
-                        if ((role == 'string' or role == 'rawString') and
-                            'f' in match.group(role + 'OrBytesPrefix').lower()):
-                            self._highlightSubpattern(text, start, end, offset,
-                                self._formattedReplacementSubpattern, 'formattedReplacement')
-
-                        # Check to see whether the current line ends with an unclosed string.
-                        if ((role == 'string' or role == 'rawString') and end == len(text) and
-                            match.group(role + 'End') != match.group(role + 'Start')):
-                            # If so, set the block state so we'll remember for the next line.
-                            state = self._getBlockStateFromStringMatch(role, match)
-                            self.setCurrentBlockState(state)
-                        break
-                except:
-                    pass
+        tokens = []
+        state = -1
+        for match in PythonSyntaxHighlighter._code.finditer(text):
+            # The top-level group that matched gives the role played by the current match.
+            role = match.lastgroup
+            if role is None:
+                continue
+            start, end = match.span()
+            if offset:
+                self._addToken(tokens, start, end, offset, role)
+            else:
+                tokens += (start, end - start, role)
+                self.setFormat(start, end - start, self._formats[role])
+
+            # Now highlight any subpatterns within the span covered by this role.
+            if role in PythonSyntaxHighlighter._subpatterns:
+                self._addSubpatternTokens(tokens, text, start, end, offset, role)
+
+            if role == 'string' or role == 'rawString':
+                # For formatted strings, also highlight the subpattern for formatted replacements.
+                if 'f' in match.group(role + 'OrBytesPrefix').lower():
+                    self._addSubpatternToken(tokens, text, start, end, offset,
+                        PythonSyntaxHighlighter._formattedReplacementSubpattern, 'formattedReplacement')
+
+                # Check to see whether the current line ends with an unclosed string.
+                if end == len(text) and match.group(role + 'End') != match.group(role + 'Start'):
+                    # If so, set the block state so we'll remember for the next line.
+                    state = self._getBlockStateFromStringMatch(role, match)
+        return tuple(tokens), state
+
+    def _getLineEndState(self, text: str, state: int) -> int:
+        '''Returns the block state that highlightBlock sets for a line of text, given the state of
+        the previous line, without highlighting it.'''
+        initialQuote = self._getInitialQuoteFromBlockState(state)
+        text = initialQuote + text
+        lastMatch = None
+        for lastMatch in PythonSyntaxHighlighter._code.finditer(text):
+            pass
+        if lastMatch is not None and lastMatch.end() == len(text):
+            role = lastMatch.lastgroup
+            if ((role == 'string' or role == 'rawString') and
+                lastMatch.group(role + 'End') != lastMatch.group(role + 'Start')):
+                return self._getBlockStateFromStringMatch(role, lastMatch)
+        return -1
 
     def _getBlockStateFromStringMatch(self, role: str, match: re.Match) -> int:
         '''Encodes information about an unclosed string (whether it starts with one or three quotes,
@@ -267,17 +457,24 @@ class PythonSyntaxHighlighter(QSyntaxHighlighter):
         quote += ' '
         return quote
 
-    def _highlightSubpatterns(self, text: str, start: int, end: int, offset: int, role: str) -> None:
-        if role in self._subpatterns:
-            for subpattern, subrole in self._subpatterns[role]:
-                self._highlightSubpattern(text, start, end, offset, subpattern, subrole)
-
-    def _highlightSubpattern(self, text: str, start: int, end: int, offset: int,
+    def _addToken(self, tokens: list, start: int, end: int, offset: int, role: str) -> None:
+        '''Highlights a token spanning the given range of text (less the offset), and adds it to a
+        list of tokens, unless it's empty.'''
+        clampedStart = max(0, start - offset)
+        clampedEnd = max(0, end - offset)
+        if clampedEnd > clampedStart:
+            tokens += (clampedStart, clampedEnd - clampedStart, role)
+            self.setFormat(clampedStart, clampedEnd - clampedStart, self._formats[role])
+
+    def _addSubpatternTokens(self, tokens: list, text: str, start: int, end: int, offset: int,
+        role: str) -> None:
+        if role in PythonSyntaxHighlighter._subpatterns:
+            for subpattern, subrole in PythonSyntaxHighlighter._subpatterns[role]:
+                self._addSubpatternToken(tokens, text, start, end, offset, subpattern, subrole)
+
+    def _addSubpatternToken(self, tokens: list, text: str, start: int, end: int, offset: int,
         subpattern: re.Pattern, subrole: str) -> None:
         for match in subpattern.finditer(text, start, end):
             substart, subend = match.span(subrole)
             if substart >= 0 and subend > substart:
-                clampedStart = max(0, substart - offset)
-                clampedEnd = max(0, subend - offset)
-                textFormat = STYLES[subrole][self.theme.value]
-                self.setFormat(clampedStart, clampedEnd - clampedStart, textFormat)
+                self._addToken(tokens, substart, subend, offset, subrole)
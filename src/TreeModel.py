@@ -0,0 +1,304 @@
+# External imports:
+import sys
+from typing import Callable
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor
+
+# Local imports:
+import tracing
+
+# Item data role used to store the ID of an item's member, for quick access by proxy models.
+IdRole = Qt.UserRole + 3
+
+class TreeNode:
+    '''
+    A member in a TreeModel, along with its parent and children.
+
+    Nodes use slots, store the type of members as a small integer code, and store whether members
+    are private or inherited as bit flags, to keep the memory used by large trees down and to make
+    filtering quick.
+    '''
+
+    __slots__ = ('parent', 'row', 'children', 'id', 'name', 'kind', 'flags', 'value', 'hasValue',
+        'error', 'info', 'pending', 'sortedByType')
+
+    # The member types that the integer codes stand for, and the rank of each type when sorting
+    # members by type (alphabetically by type name).
+    kinds = ('module', 'abstract base class', 'class', 'function', 'property', 'object')
+    kindRanks = tuple(map(sorted(kinds).index, kinds))
+    _kindCodes = { kind: code for code, kind in enumerate(kinds) }
+
+    # Flags for private members (beginning with a single underscore) and inherited members.
+    privateFlag = 1
+    inheritedFlag = 2
+
+    def __init__(self, id: str, name: str, type: str, inheritance: str = '', value: object = None,
+        hasValue: bool = True, error: str = '', info: object = None):
+        '''Initializes a TreeNode instance.'''
+        self.parent = None
+        self.row = 0
+        self.children = ()
+        self.id = sys.intern(id)
+        self.name = name
+        self.kind = TreeNode._kindCodes.get(type, TreeNode._kindCodes['object'])
+        self.flags = 0
+        if not name.startswith('__') and (len(name) == 0 or name[0] == '_'):
+            self.flags |= TreeNode.privateFlag
+        if inheritance == 'inherited':
+            self.flags |= TreeNode.inheritedFlag
+        self.value = value
+        self.hasValue = hasValue
+        self.error = error
+        self.info = info
+
+        # Whether the children of this node have yet to be created.
+        self.pending = False
+
+        # The sortByType setting of the model when the children of this node were last sorted, or
+        # None if they haven't been.
+        self.sortedByType = None
+
+    @property
+    def type(self) -> str:
+        '''The type of the member, as returned by inspection.getMemberType.'''
+        return TreeNode.kinds[self.kind]
+
+    @property
+    def inheritance(self) -> str:
+        '''The inheritance of the member: 'inherited' or an empty string.'''
+        return 'inherited' if self.flags & TreeNode.inheritedFlag else ''
+
+    def setChildren(self, children: list) -> None:
+        '''Sets the children of a node that hasn't been added to a model yet.'''
+        for row, child in enumerate(children):
+            child.parent = self
+            child.row = row
+        self.children = children
+
+NodeFetcher = Callable[[TreeNode], None]
+
+class TreeModel(QAbstractItemModel):
+    '''
+    A tree of members, with columns for the name, type, and inheritance of each member.
+
+    The children of each node are kept sorted by name, or by type and then name, as they're
+    inserted. When the sort order changes, only the children of nodes that views hold indexes to are
+    sorted again at once, and the children of other nodes are sorted when they're next accessed.
+    The children of a pending node are created by a callback when the node is first expanded.
+    '''
+
+    def __init__(self, fetchChildren: NodeFetcher, icons: dict):
+        '''Initializes a TreeModel instance, using the given icons for each type of member.'''
+        super().__init__()
+        self._fetchChildren = fetchChildren
+        self._sortByType = True
+        self._icons = [icons[kind] for kind in TreeNode.kinds]
+        self._errorBrush = QBrush(QColor(255, 0, 0, 64))
+        self._rootNode = TreeNode('', '', 'object')
+        self._rootNode.children = []
+        self._rootNode.sortedByType = self._sortByType
+
+    @property
+    def topLevelNodes(self) -> list:
+        '''The nodes at the top level of the tree.'''
+        return self.getChildren(None)
+
+    @property
+    def sortByType(self) -> bool:
+        '''Whether nodes are sorted by type before name.'''
+        return self._sortByType
+
+    @sortByType.setter
+    def sortByType(self, value: bool) -> None:
+        if value == self._sortByType:
+            return
+
+        # Rearrange the top-level nodes and the siblings of any nodes with persistent indexes (such as
+        # the expanded and selected nodes in views), and update the indexes to match. The children
+        # of other nodes haven't been seen in this order yet, so they're sorted when next accessed.
+        self.layoutAboutToBeChanged.emit()
+        oldIndexes = self.persistentIndexList()
+        oldPositions = [(index.internalPointer(), index.column()) for index in oldIndexes]
+        self._sortByType = value
+        with tracing.span('sort'):
+            self.getChildren(None)
+            for node, column in oldPositions:
+                self.getChildren(node.parent)
+        newIndexes = [self.createIndex(node.row, column, node) for node, column in oldPositions]
+        self.changePersistentIndexList(oldIndexes, newIndexes)
+        self.layoutChanged.emit()
+
+    @tracing.traced('sort')
+    def setChildren(self, node: TreeNode, children: list) -> None:
+        '''Sorts a list of nodes in the order the model keeps them in, and sets them as the children
+        of a node that hasn't been added to the model yet.'''
+        children.sort(key = self._getSortKey())
+        node.setChildren(children)
+        node.sortedByType = self._sortByType
+
+    def getChildren(self, parentNode: TreeNode) -> list:
+        '''Returns the children of the given node, or the top-level nodes if it's None, sorting them
+        first if they haven't been sorted since the sort order changed.'''
+        parentNode = parentNode or self._rootNode
+        if parentNode.sortedByType is not self._sortByType:
+            self._sortChildren(parentNode)
+        return parentNode.children
+
+    def itemFromIndex(self, index: QModelIndex) -> TreeNode:
+        '''Returns the node corresponding to the given index, or None if the index is invalid.'''
+        return index.internalPointer() if index.isValid() else None
+
+    def indexFromItem(self, node: TreeNode) -> QModelIndex:
+        '''Returns the index of the first column of the given node.'''
+        self.getChildren(node.parent)
+        return self.createIndex(node.row, 0, node)
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        '''Returns the index of a child of the given parent.'''
+        children = self.getChildren(parent.internalPointer() if parent.isValid() else None)
+        if 0 <= row < len(children) and 0 <= column < 3:
+            return self.createIndex(row, column, children[row])
+        return QModelIndex()
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        '''Returns the index of the parent of the given node.'''
+        parentNode = index.internalPointer().parent if index.isValid() else None
+        return self.indexFromItem(parentNode) if parentNode else QModelIndex()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        '''Returns the number of children of the given parent.'''
+        if parent.column() > 0:
+            return 0
+        parentNode = parent.internalPointer() if parent.isValid() else self._rootNode
+        return len(parentNode.children)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        '''Returns the number of columns: name, type, and inheritance.'''
+        return 3
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> object:
+        '''Returns the data for the given index and role, computing the type and inheritance text on demand.'''
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return node.name
+            elif column == 1:
+                return TreeNode.kinds[node.kind]
+            return node.inheritance
+        elif role == IdRole:
+            return node.id
+        elif role == Qt.DecorationRole and column == 0:
+            return self._icons[node.kind]
+        elif role == Qt.BackgroundRole and column == 0 and node.error:
+            return self._errorBrush
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        '''Makes nodes selectable, but not editable.'''
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled if index.isValid() else Qt.NoItemFlags
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        '''Reports that a pending node has children, so the view shows an expansion indicator.'''
+        if parent.column() > 0:
+            return False
+        parentNode = parent.internalPointer() if parent.isValid() else self._rootNode
+        return parentNode.pending or len(parentNode.children) > 0
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        '''Returns whether the children of the given node have yet to be created.'''
+        return parent.isValid() and parent.internalPointer().pending
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        '''Creates the children of a pending node.'''
+        if parent.isValid():
+            self.fetchItem(parent.internalPointer())
+
+    def fetchItem(self, node: TreeNode) -> None:
+        '''Creates the children of a pending node, if it hasn't been fetched already.'''
+        if node.pending:
+            node.pending = False
+            self._fetchChildren(node)
+
+    @tracing.traced('insertNodes')
+    def insertNodes(self, parentNode: TreeNode, nodes: list) -> None:
+        '''Inserts nodes (and their children) into the given parent, or into the top level if it's
+        None, keeping the children in order.'''
+        if len(nodes) == 0:
+            return
+        siblings = self.getChildren(parentNode)
+        if not isinstance(siblings, list):
+            siblings = []
+            parentNode.children = siblings
+        parentIndex = self.indexFromItem(parentNode) if parentNode else QModelIndex()
+
+        # Insert the nodes all at once if they belong after the existing children (as they do
+        # when the children of a pending node are fetched), otherwise one at a time.
+        key = self._getSortKey()
+        nodes = sorted(nodes, key = key)
+        if len(siblings) == 0 or key(siblings[-1]) <= key(nodes[0]):
+            insertions = [(len(siblings), nodes)]
+        else:
+            insertions = [(self._findInsertionRow(siblings, key(node), key), [node]) for node in nodes]
+            insertions.reverse()
+        for row, insertedNodes in insertions:
+            self.beginInsertRows(parentIndex, row, row + len(insertedNodes) - 1)
+            siblings[row:row] = insertedNodes
+            for siblingRow in range(row, len(siblings)):
+                siblings[siblingRow].parent = parentNode
+                siblings[siblingRow].row = siblingRow
+            self.endInsertRows()
+
+    def removeNodes(self, nodes: list) -> None:
+        '''Removes nodes (and their children) that have the same parent from the tree, removing
+        consecutive rows together.'''
+        if len(nodes) == 0:
+            return
+        parentNode = nodes[0].parent
+        siblings = self.getChildren(parentNode)
+        parentIndex = self.indexFromItem(parentNode) if parentNode else QModelIndex()
+
+        # Group the rows into ranges, and remove them starting from the end. Renumber the siblings
+        # after each range before announcing its removal, since views may look up their rows then.
+        ranges = []
+        for row in sorted(node.row for node in nodes):
+            if len(ranges) and ranges[-1][1] == row - 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(parentIndex, first, last)
+            del siblings[first:last + 1]
+            for row in range(first, len(siblings)):
+                siblings[row].row = row
+            self.endRemoveRows()
+
+    def _getSortKey(self) -> Callable:
+        '''Returns a function that computes the key used to sort nodes.'''
+        if self._sortByType:
+            return lambda node: (TreeNode.kindRanks[node.kind], node.name)
+        return lambda node: node.name
+
+    @staticmethod
+    def _findInsertionRow(siblings: list, nodeKey: object, key: Callable) -> int:
+        '''Returns the row at which a node with the given key belongs among sorted siblings (after
+        any siblings with the same key).'''
+        low, high = 0, len(siblings)
+        while low < high:
+            middle = (low + high) // 2
+            if nodeKey < key(siblings[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _sortChildren(self, parentNode: TreeNode) -> None:
+        '''Sorts the children of a node with the current sort order.'''
+        parentNode.sortedByType = self._sortByType
+        if len(parentNode.children) == 0:
+            return
+        parentNode.children.sort(key = self._getSortKey())
+        for row, node in enumerate(parentNode.children):
+            node.row = row
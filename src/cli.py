@@ -0,0 +1,153 @@
+'''
+Inspects modules without a user interface (or Qt), for use in batch jobs.
+
+Each module is imported and inspected in turn, and its members are written to standard output as
+they're found, as newline-delimited JSON: one JSON object per line, for the module itself followed
+by each of its members (depth first), with the member's ID, name, type, inheritance, and error,
+and unless --brief is given, the details pyspector displays for it (signature, documentation,
+source location, base and derived classes, and so on). Nothing is kept once it has been written, so
+memory use doesn't grow with the size of a module.
+
+With --processes, modules are imported and inspected in that many worker processes at once, each
+module in a process of its own, and each module's members are written once the whole module has
+been inspected (in the order the modules were given). A module that crashes its process, or takes
+longer than importTimeout seconds to import, is written as a record with an error, and the other
+modules are unaffected. Anything printed by the modules themselves goes to standard error. The exit
+status is 1 if any of the modules couldn't be imported or inspected.
+
+Usage: python src/cli.py [--brief] [--processes count] moduleName ...
+'''
+
+# External imports:
+import argparse
+import contextlib
+import importlib
+import json
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+import os
+import sys
+from typing import Iterator
+
+# Local imports:
+import inspection
+import tracing
+
+# The number of seconds a worker process may spend importing a module before it is terminated.
+importTimeout = 60
+
+def generateRecords(moduleName: str, brief: bool = False) -> Iterator[dict]:
+    '''Imports a module and yields a record for it and each of its members, as they're found. If
+    inspecting the module fails partway, a final record for the module reports the error.'''
+    try:
+        for memberData in inspection.iterateModule(moduleName):
+            record = {
+                'id': memberData.id,
+                'name': memberData.name,
+                'type': memberData.type,
+                'inheritance': memberData.inheritance,
+                'error': memberData.error,
+            }
+            if not brief and not memberData.error:
+                record['info'] = inspection.describeMember(memberData.type, memberData.value,
+                    maxReprLength = 10000).toDict()
+            yield record
+    except Exception as exception:
+        yield _getErrorRecord(moduleName, f'Could not inspect module ({exception}).')
+
+def generateLines(moduleName: str, brief: bool = False) -> Iterator[str]:
+    '''Imports a module and yields a line of JSON for it and each of its members.'''
+    for record in generateRecords(moduleName, brief):
+        yield json.dumps(record, default = repr)
+
+def generateLinesInProcesses(moduleNames: list, brief: bool, processCount: int) -> Iterator[list]:
+    '''Yields a list of lines of JSON for each module, in order, inspecting the modules in up to
+    processCount worker processes at once.'''
+    context = multiprocessing.get_context('spawn')
+    jobs = {}
+    finishedLines = {}
+    nextIndex = 0
+    try:
+        for index, moduleName in enumerate(moduleNames):
+            # Start more processes, then service them until this module has finished.
+            while index not in finishedLines:
+                while nextIndex < len(moduleNames) and len(jobs) < processCount:
+                    jobs[nextIndex] = inspection.ProcessJob(context, moduleNames[nextIndex],
+                        _inspectInProcess, (brief,))
+                    nextIndex += 1
+                wait([job.connection for job in jobs.values()] +
+                    [job.process.sentinel for job in jobs.values()], timeout = 1)
+                for jobIndex, job in list(jobs.items()):
+                    lines = None
+                    for message in job.receive():
+                        if message[0] == 'loaded':
+                            lines = message[1]
+                    error = job.getError(importTimeout) if lines is None else None
+                    if error:
+                        lines = [json.dumps(_getErrorRecord(job.moduleName, error))]
+                    if lines is not None:
+                        job.terminate()
+                        del jobs[jobIndex]
+                        finishedLines[jobIndex] = lines
+            yield finishedLines.pop(index)
+    finally:
+        for job in jobs.values():
+            job.terminate()
+
+def _getErrorRecord(moduleName: str, error: str) -> dict:
+    '''Returns the record for a module that couldn't be inspected.'''
+    return { 'id': moduleName, 'name': moduleName, 'type': 'module', 'inheritance': '', 'error': error }
+
+def _inspectInProcess(moduleName: str, connection: Connection, brief: bool) -> None:
+    '''Sends ('imported',) once a module has been imported (or has failed to import), then
+    ('loaded', lines) with the lines of JSON for the module, in a worker process.'''
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            importlib.import_module(moduleName)
+        except:
+            pass
+        connection.send(('imported',))
+        connection.send(('loaded', list(generateLines(moduleName, brief))))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = 'Inspects Python modules, writing their members '
+        'to standard output as newline-delimited JSON.')
+    parser.add_argument('--brief', action = 'store_true',
+        help = 'omit the details of each member, such as its documentation')
+    parser.add_argument('--processes', type = int, default = 0,
+        help = 'the number of worker processes to inspect modules in')
+    parser.add_argument('moduleNames', nargs = '+', metavar = 'moduleName',
+        help = 'a module to inspect')
+    arguments = parser.parse_args()
+
+    # Keep anything the modules print out of the output.
+    output = sys.stdout
+    failed = False
+    with contextlib.redirect_stdout(sys.stderr), contextlib.ExitStack() as stack:
+        if arguments.processes > 0:
+            lineGroups = stack.enter_context(contextlib.closing(generateLinesInProcesses(
+                arguments.moduleNames, arguments.brief, arguments.processes)))
+        else:
+            lineGroups = (generateLines(moduleName, arguments.brief)
+                for moduleName in arguments.moduleNames)
+
+        try:
+            for lines in lineGroups:
+                # Only a module's last record can have an error (see generateRecords).
+                for line in lines:
+                    output.write(line + '\n')
+                if json.loads(line)['error']:
+                    failed = True
+                output.flush()
+        except BrokenPipeError:
+            # The reader has stopped reading (as with "| head"), which isn't an error. Discard the
+            # rest of the output, so that flushing it on exit doesn't fail again.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), output.fileno())
+            return 0
+
+    if tracing.exitFilename:
+        tracing.exportChromeTrace(tracing.exitFilename)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,420 @@
+'''
+Inspection of Python modules, independent of the user interface.
+'''
+
+# External imports:
+import importlib
+import inspect
+import multiprocessing
+from multiprocessing.connection import Connection
+import time
+from typing import Callable, Iterator
+
+# Local imports:
+import tracing
+
+ProgressCallback = Callable[[int, int], None]
+CancellationCheck = Callable[[], bool]
+
+class InspectionCancelled(Exception):
+    '''Raised when the inspection of a module is cancelled before it completes.'''
+    pass
+
+class MemberInfo:
+    '''Provides the details displayed for a member, without requiring access to its value.'''
+
+    def __init__(self):
+        '''Initializes a MemberInfo instance.'''
+        self.qualifiedName = None
+        self.displayType = ''
+        self.valueRepr = None
+        self.signature = None
+        self.doc = None
+        self.sourceFile = None
+        self.startLine = None
+        self.lineCount = None
+
+        # Base and derived classes, as lists of (module name, qualified class name) tuples.
+        self.baseClasses = []
+        self.derivedClasses = []
+
+    def toDict(self) -> dict:
+        '''Returns a dictionary of the details, suitable for JSON serialization.'''
+        return dict(self.__dict__)
+
+    @staticmethod
+    def fromDict(values: dict) -> 'MemberInfo':
+        '''Creates a MemberInfo instance from a dictionary returned by toDict.'''
+        info = MemberInfo()
+        info.__dict__.update(values)
+        info.baseClasses = [tuple(baseClass) for baseClass in info.baseClasses]
+        info.derivedClasses = [tuple(derivedClass) for derivedClass in info.derivedClasses]
+        return info
+
+class MemberData:
+    '''Provides the ID, name, type, value, and inheritance of a member, as well as a list of its members.'''
+
+    def __init__(self, id: str, name: str, type: str, value: object, inheritance: str = '', error: str = ''):
+        '''Initializes a MemberData instance.'''
+        self.id = id
+        self.name = name
+        self.type = type
+        self.value = value
+        self.inheritance = inheritance
+        self.error = error
+        self.children = []
+
+        # Whether the members of this member have yet to be inspected.
+        self.pending = False
+
+        # Whether the value is available. If not (for instance, when the member was inspected in
+        # another process or loaded from a cache), it can be obtained with resolveValue.
+        self.hasValue = True
+
+        # Details of the member, when they have been computed in advance (for instance, when the
+        # member was inspected in another process and the value is unavailable).
+        self.info = None
+
+    def toDict(self) -> dict:
+        '''Returns a dictionary of the member and its members (but not its value), suitable for JSON
+        serialization.'''
+        return {
+            'id': self.id,
+            'name': self.name,
+            'type': self.type,
+            'inheritance': self.inheritance,
+            'error': self.error,
+            'info': self.info.toDict() if self.info else None,
+            'children': [childData.toDict() for childData in self.children],
+        }
+
+    @staticmethod
+    def fromDict(values: dict) -> 'MemberData':
+        '''Creates a MemberData instance (with no value) from a dictionary returned by toDict.'''
+        memberData = MemberData(values['id'], values['name'], values['type'], None,
+            values['inheritance'], values['error'])
+        memberData.hasValue = False
+        if values['info']:
+            memberData.info = MemberInfo.fromDict(values['info'])
+        memberData.children = [MemberData.fromDict(childValues) for childValues in values['children']]
+        return memberData
+
+def getMemberType(memberValue: object) -> str:
+    '''Attempts to determine the type of a member from its value.'''
+    if inspect.ismodule(memberValue):
+        return 'module'
+    if inspect.isabstract(memberValue):
+        return 'abstract base class'
+    if inspect.isclass(memberValue):
+        return 'class'
+    if inspect.isfunction(memberValue) or inspect.isbuiltin(memberValue) or inspect.isroutine(memberValue):
+        return 'function'
+    if inspect.isdatadescriptor(memberValue):
+        return 'property'
+    return 'object'
+
+def describeMember(memberType: str, memberValue: object, maxReprLength: int = None) -> MemberInfo:
+    '''Gathers the details displayed for a member with the given type and value.'''
+    info = MemberInfo()
+    if hasattr(memberValue, '__qualname__'):
+        info.qualifiedName = memberValue.__qualname__
+
+    # Determine the type, and the value of objects.
+    info.displayType = memberType
+    if memberType == 'object':
+        info.displayType = str(type(memberValue))
+        try:
+            info.valueRepr = repr(memberValue)
+            if maxReprLength is not None and len(info.valueRepr) > maxReprLength:
+                info.valueRepr = info.valueRepr[:maxReprLength] + '...'
+        except:
+            info.valueRepr = '(could not represent value)'
+
+    # Use the filename for modules.
+    # See if we can find the source file for other objects.
+    sourceValue = memberValue
+    if memberType == 'module' and hasattr(memberValue, '__file__'):
+        info.sourceFile = memberValue.__file__
+    else:
+        try:
+            # Substitute the getter, setter, or deleter for a property instance.
+            # TODO: Generalize this to data descriptors other than just the 'property' class.
+            if isinstance(sourceValue, property):
+                if sourceValue.fget:
+                    sourceValue = sourceValue.fget
+                elif sourceValue.fset:
+                    sourceValue = sourceValue.fset
+                elif sourceValue.fdel:
+                    sourceValue = sourceValue.fdel
+
+            # Note that inspect.getsourcelines calls unwrap, while getsourcefile does not.
+            sourceFile = inspect.getsourcefile(inspect.unwrap(sourceValue))
+            lines = inspect.getsourcelines(sourceValue)
+            info.sourceFile = sourceFile
+            info.startLine = lines[1]
+            info.lineCount = len(lines[0])
+        except:
+            pass
+
+    # Determine the inheritance hierarchy of classes.
+    if 'class' in memberType:
+        try:
+            baseClasses = list(inspect.getmro(memberValue))[1:] # omit the first entry
+            info.baseClasses = [(baseClass.__module__, baseClass.__qualname__)
+                for baseClass in reversed(baseClasses)]
+            info.derivedClasses = [(derivedClass.__module__, derivedClass.__qualname__)
+                for derivedClass in memberValue.__subclasses__()]
+        except:
+            pass
+
+    # Determine the signature of callable objects.
+    try:
+        info.signature = f'{sourceValue.__name__}{inspect.signature(sourceValue)}'
+    except:
+        pass
+
+    # Get documentation for non-object types.
+    if memberType != 'object':
+        try:
+            info.doc = inspect.getdoc(memberValue)
+        except:
+            pass
+
+    return info
+
+def inspectModule(moduleName: str, lazy: bool = False, progress: ProgressCallback = None,
+    isCancelled: CancellationCheck = None) -> MemberData:
+    '''
+    Imports a module and inspects its members.
+
+    When lazy is true, the members of the module are left pending, to be inspected later with
+    inspectObject. The optional progress callback receives the number of top-level members
+    inspected so far and the total number of top-level members. If the optional isCancelled
+    callback returns true, inspection stops by raising InspectionCancelled.
+    '''
+    try:
+        with tracing.span('import', moduleName):
+            module = importlib.import_module(moduleName)
+    except:
+        return MemberData(moduleName, moduleName, 'module', None, error = 'Could not import module.')
+
+    moduleData = MemberData(moduleName, moduleName, 'module', module)
+    if lazy:
+        moduleData.pending = True
+    else:
+        with tracing.span('inspect', moduleName):
+            inspectObject(moduleData, module, lazy, progress = progress, isCancelled = isCancelled)
+    return moduleData
+
+def inspectObject(parentData: MemberData, obj: object, lazy: bool = False, depth: int = 0,
+    progress: ProgressCallback = None, isCancelled: CancellationCheck = None) -> None:
+    '''Recursively adds the members of an object to the children of parentData.'''
+    members = inspect.getmembers(obj)
+    childIds = { childData.id for childData in parentData.children }
+    for (memberIndex, (memberName, memberValue)) in enumerate(members):
+        if isCancelled and isCancelled():
+            raise InspectionCancelled()
+        if progress:
+            progress(memberIndex, len(members))
+
+        # Add data for the current member.
+        memberData = _createMemberData(parentData.id, obj, memberName, memberValue, childIds)
+        if memberData is None:
+            continue
+        parentData.children.append(memberData)
+
+        # Recurse into classes (but not if it's the same class we're inspecting). In lazy mode,
+        # defer inspection until it's requested.
+        if 'class' in memberData.type and memberValue != obj:
+            if lazy:
+                memberData.pending = True
+            else:
+                print(f'{"  "*depth}inspecting class {memberName} in module {memberValue.__module__}')
+                inspectObject(memberData, memberValue, lazy, depth + 1, isCancelled = isCancelled)
+
+    if progress:
+        progress(len(members), len(members))
+
+def iterateModule(moduleName: str) -> Iterator[MemberData]:
+    '''Imports a module and yields its data, followed by the data of its members as they're found
+    (see iterateMembers).'''
+    try:
+        with tracing.span('import', moduleName):
+            module = importlib.import_module(moduleName)
+    except:
+        yield MemberData(moduleName, moduleName, 'module', None, error = 'Could not import module.')
+        return
+
+    moduleData = MemberData(moduleName, moduleName, 'module', module)
+    yield moduleData
+    yield from iterateMembers(moduleData, module)
+
+def iterateMembers(parentData: MemberData, obj: object) -> Iterator[MemberData]:
+    '''
+    Recursively yields the data of the members of an object, depth first, as they're found.
+
+    Unlike inspectObject, the members aren't added to the children of their parents, so nothing is
+    kept once the caller is done with each member (apart from the getter, setter, and deleter of a
+    property, which are yielded right after it).
+    '''
+    childIds = set()
+    for memberName, memberValue in inspect.getmembers(obj):
+        memberData = _createMemberData(parentData.id, obj, memberName, memberValue, childIds)
+        if memberData is None:
+            continue
+        yield memberData
+        yield from memberData.children
+        if 'class' in memberData.type and memberValue != obj:
+            yield from iterateMembers(memberData, memberValue)
+
+def _createMemberData(parentId: str, obj: object, memberName: str, memberValue: object,
+    childIds: set) -> MemberData:
+    '''Returns the data for a member of an object (and the functions of a property), or None if
+    the member should be skipped. Adds the ID of the member to childIds.'''
+    memberType = getMemberType(memberValue)
+
+    # Skip "magic" members that are classes -- they cause problems.
+    if memberName.startswith('__') and memberType == 'class':
+        return None
+
+    # Skip modules within modules.
+    if memberType == 'module':
+        # TODO: Should we add nested modules? Seems useful, but leads to a segfault in the
+        # case of matplotlib.
+        return None
+
+    # Don't add the same member twice.
+    id = f'{parentId}/{memberName}'
+    if id in childIds:
+        return None
+    childIds.add(id)
+
+    # Check inheritance of class members.
+    inheritance = 'inherited' if inspect.isclass(obj) and memberName not in obj.__dict__ else ''
+
+    # For functions, try to include the signature in the name.
+    name = memberName
+    if memberType == 'function':
+        try:
+            name += str(inspect.signature(memberValue))
+        except:
+            pass
+    memberData = MemberData(id, name, memberType, memberValue, inheritance)
+
+    # Add the property getter, setter, deleter functions.
+    # TODO: Generalize this to data descriptors other than just the 'property' class.
+    if type(memberValue) == property:
+        if memberValue.fget:
+            memberData.children.append(MemberData(f'{id}/get', '[get]', 'function', memberValue.fget))
+        if memberValue.fset:
+            memberData.children.append(MemberData(f'{id}/set', '[set]', 'function', memberValue.fset))
+        if memberValue.fdel:
+            memberData.children.append(MemberData(f'{id}/delete', '[delete]', 'function', memberValue.fdel))
+    return memberData
+
+def resolveValue(id: str) -> object:
+    '''Returns the value of the member with the given ID, importing its module if necessary.'''
+    parts = id.split('/')
+    value = importlib.import_module(parts[0])
+    for part in parts[1:]:
+        if isinstance(value, property) and part in ['get', 'set', 'delete']:
+            value = { 'get': value.fget, 'set': value.fset, 'delete': value.fdel }[part]
+        else:
+            value = getattr(value, part)
+    return value
+
+def inspectModuleInProcess(moduleName: str, connection: Connection) -> None:
+    '''
+    Imports and inspects a module, sending the results through a connection to another process.
+
+    Values can't be sent between processes, so they are replaced by the details of each member.
+    The messages sent are ('imported',), any number of ('progress', count, total), and finally
+    ('loaded', moduleData).
+    '''
+    try:
+        module = importlib.import_module(moduleName)
+    except:
+        connection.send(('loaded', MemberData(moduleName, moduleName, 'module', None,
+            error = 'Could not import module.')))
+        return
+    connection.send(('imported',))
+
+    moduleData = MemberData(moduleName, moduleName, 'module', module)
+    progress = lambda count, total: connection.send(('progress', count, total))
+    try:
+        inspectObject(moduleData, module, progress = progress)
+    except Exception as exception:
+        connection.send(('loaded', MemberData(moduleName, moduleName, 'module', None,
+            error = f'Could not inspect module ({exception}).')))
+        return
+    _replaceValuesWithInfo(moduleData, {})
+    connection.send(('loaded', moduleData))
+
+class ProcessJob:
+    '''
+    Tracks a worker process that imports and inspects a module, sending messages through a
+    connection (see inspectModuleInProcess).
+
+    The process runs the target function (inspectModuleInProcess by default) with the module name,
+    the connection, and any further arguments. The target sends ('imported',) once the module has
+    been imported, so that a process that takes too long to import it can be detected.
+    '''
+
+    def __init__(self, context: multiprocessing.context.BaseContext, moduleName: str,
+        target: Callable = inspectModuleInProcess, args: tuple = ()):
+        '''Initializes a ProcessJob instance, starting the worker process.'''
+        self.moduleName = moduleName
+        self.imported = False
+        self.disconnected = False
+        self.startTime = time.monotonic()
+        self.connection, childConnection = context.Pipe(duplex = False)
+        self.process = context.Process(target = target, args = (moduleName, childConnection) + args,
+            daemon = True)
+        self.process.start()
+        childConnection.close()
+
+    def receive(self) -> list:
+        '''Returns the messages that are available from the process, without waiting.'''
+        messages = []
+        try:
+            while self.connection.poll():
+                message = self.connection.recv()
+                if message[0] == 'imported':
+                    self.imported = True
+                messages.append(message)
+        except (EOFError, OSError):
+            self.disconnected = True
+        return messages
+
+    def getError(self, importTimeout: float) -> str:
+        '''Returns an error message if the process has died or has spent longer than the timeout (in
+        seconds) importing the module, otherwise None. Call this after receiving all messages.'''
+        if self.disconnected or (not self.process.is_alive() and not self.connection.poll()):
+            # The connection may be closed just before the process exits.
+            self.process.join(1)
+            return f'The inspection process terminated unexpectedly (exit code {self.process.exitcode}).'
+        if not self.imported and time.monotonic() - self.startTime > importTimeout:
+            return 'Timed out while importing module.'
+        return None
+
+    def terminate(self) -> None:
+        '''Stops the worker process, if it's still running, and releases its resources.'''
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+def _replaceValuesWithInfo(memberData: MemberData, infoCache: dict) -> None:
+    '''Recursively replaces the values of members with their details.'''
+    # Inherited members share values with their base classes, so only describe each value once.
+    # (The values are all kept alive by the module, so their IDs are unique.)
+    key = (memberData.type, id(memberData.value))
+    info = infoCache.get(key)
+    if info is None:
+        info = describeMember(memberData.type, memberData.value, maxReprLength = 10000)
+        infoCache[key] = info
+    memberData.info = info
+    memberData.value = None
+    memberData.hasValue = False
+    for childData in memberData.children:
+        _replaceValuesWithInfo(childData, infoCache)
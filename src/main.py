@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import QApplication
 # Local imports:
 from Config import Config
 from MainWindow import MainWindow
+import tracing
 
 if __name__ == '__main__':
     # Make sure the configuration directory exists.
@@ -22,5 +23,8 @@ if __name__ == '__main__':
     app = QApplication(sys.argv)
     mainWindow = MainWindow(config)
 
-    # Exit after running the application main loop.
-    sys.exit(app.exec())
+    # Run the application main loop, saving the trace afterward if requested, then exit.
+    exitCode = app.exec()
+    if tracing.exitFilename:
+        tracing.exportChromeTrace(tracing.exitFilename)
+    sys.exit(exitCode)
@@ -1,10 +1,23 @@
 # External imports:
 import docutils.core
+import docutils.io
 import docutils.nodes
 import docutils.parsers.rst
+import docutils.readers.standalone
 import docutils.utils
+import docutils.writers.html4css1
+from html import escape
+from markdown import markdown
 import re
 from os.path import dirname
+import threading
+
+# Local imports:
+import tracing
+
+# The version of the conversion from documentation strings to HTML. Increment this whenever the
+# HTML produced changes, so that HTML cached by earlier versions isn't used.
+rendererVersion = 1
 
 def customRoleHandler(name, rawText, text, lineNo, inliner, options = {}, content = []):
     '''Inserts a reference node when interpreted text with a custom role is encountered.'''
@@ -70,26 +83,129 @@ docutils.parsers.rst.directives.register_directive('versionadded', VersionAdded)
 docutils.parsers.rst.directives.register_directive('versionchanged', VersionChanged)
 docutils.parsers.rst.directives.register_directive('deprecated', Deprecated)
 
+class RstRenderer:
+    '''
+    Converts reStructuredText documentation strings to HTML fragments.
+
+    Setting up docutils takes longer than converting a typical documentation string, so a single
+    publisher (with its parser, settings, and writer) is configured on first use and reused. Text
+    without any reStructuredText markup is converted to HTML paragraphs directly, producing the
+    same HTML that docutils would. Instances can be used from any thread.
+    '''
+
+    # Patterns that may indicate reStructuredText markup in text: inline markup, escapes, references,
+    # roles, fields, literal blocks, hyperlinks and email addresses, unusual line breaks, indented
+    # lines, and lines that may start lists, tables, directives, doctests, or section titles.
+    _markupRegEx = re.compile(r'''
+        [*`|\\@\x00-\x09\x0b-\x1f\x85\u2028\u2029]
+        | [\w\]]__?(?!\w)
+        | :(?=\S)
+        | ^(?: [ ]+\S | [-+*=/#\u2022\u2023\u2043] | \(?(?:\d+|[a-zA-Z]|[ivxlcdmIVXLCDM]+|\#)[.)](?:\s|$) | \.\. | >>> )
+        | ^([!-/:-@[-`{-~])\1*[ ]*$
+        ''', re.MULTILINE | re.VERBOSE)
+
+    # Docutils reports lines longer than this as errors.
+    _maxLineLength = 10000
+
+    def __init__(self):
+        '''Initializes an RstRenderer instance.'''
+        self._lock = threading.Lock()
+        self._publisher = None
+
+    def render(self, rstText, defaultRole = 'code'):
+        '''Converts a reStructuredText documentation string to an HTML fragment.'''
+        if self.isPlainText(rstText):
+            return RstRenderer._paragraphsToHtml(rstText)
+
+        # Set the default role to use when role is not specified before interpreted text.
+        # Note that matplotlib.cycler presumes default role is 'obj', while most other files presume
+        # default role is 'code'.
+        modifiedRstText = f'.. default-role:: {defaultRole}\n{rstText}'
+
+        # Convert from reStructuredText to HTML.
+        with self._lock:
+            publisher = self._getPublisher()
+            publisher.set_source(modifiedRstText)
+            publisher.set_destination()
+            html = publisher.publish()
+
+        # Permit unpaired asterisk delimiters that docutils finds problematic.
+        if '<span class="problematic"' in html:
+            asteriskRegEx = '<a href=".*"><span class="problematic" id=".*">\\*</span></a>'
+            html = re.sub(asteriskRegEx, '*', html)
+        return html
+
+    def isPlainText(self, text):
+        '''Returns whether text certainly contains no reStructuredText markup, and can be converted
+        to HTML paragraphs directly.'''
+        return (len(text.strip()) > 0 and len(text) < RstRenderer._maxLineLength
+            and not RstRenderer._markupRegEx.search(text))
+
+    def _getPublisher(self):
+        '''Returns the publisher, creating and configuring it if necessary.'''
+        if self._publisher is None:
+            templateFile = f'{dirname(dirname(__file__))}/templates/rstToHtml.txt'
+            settings = {
+                'template': templateFile,              # Use a template that discards all but the body.
+                'output_encoding': 'unicode',          # Provide output as an unencoded Unicode string.
+                'report_level': 3,                     # Ignore info (1) and warning (2) messages.
+                'halt_level': 3,                       # Stop for error (3) or severe (4) messages.
+                'traceback': True,                     # Raise an exception if an error occurs.
+            }
+            parser = docutils.parsers.rst.Parser()
+            reader = docutils.readers.standalone.Reader(parser)
+            writer = docutils.writers.html4css1.Writer()
+            publisher = docutils.core.Publisher(reader, parser, writer,
+                source_class = docutils.io.StringInput, destination_class = docutils.io.StringOutput)
+            publisher.process_programmatic_settings(None, settings, None)
+            self._publisher = publisher
+        return self._publisher
+
+    @staticmethod
+    def _paragraphsToHtml(text):
+        '''Converts text without markup to HTML paragraphs, one for each block of non-blank lines,
+        escaped as docutils does.'''
+        specialCharacters = docutils.writers.html4css1.HTMLTranslator.special_characters
+        html = ''
+        paragraphLines = []
+        for line in text.splitlines() + ['']:
+            line = line.rstrip()
+            if len(line):
+                paragraphLines.append(line)
+            elif len(paragraphLines):
+                html += '<p>' + '\n'.join(paragraphLines).translate(specialCharacters) + '</p>\n'
+                paragraphLines = []
+        return html
+
+# A renderer shared by all callers of rstToHtml.
+_rstRenderer = RstRenderer()
+
+@tracing.traced('rstToHtml')
 def rstToHtml(rstText, defaultRole = 'code'):
     '''Converts a reStructuredText documentation string to an HTML fragment.'''
-    # Initialize settings.
-    templateFile = f'{dirname(dirname(__file__))}/templates/rstTohtml.txt'
-    settings = {
-        'template': templateFile,              # Use a template that discards all but the body.
-        'output_encoding': 'unicode',          # Provide output as an unencoded Unicode string.
-        'report_level': 3,                     # Ignore info (1) and warning (2) messages.
-        'halt_level': 3,                       # Stop for error (3) or severe (4) messages.
-        'traceback': True,                     # Raise an exception if an error occurs.
-    }
-
-    # Set the default role to use when role is not specified before interpreted text.
-    # Note that matplotlib.cycler presumes default role is 'obj', while most other files presume
-    # default role is 'code'.
-    modifiedRstText = f'.. default-role:: {defaultRole}\n{rstText}'
-
-    # Convert from reStructuredText to HTML.
-    html = docutils.core.publish_string(modifiedRstText, writer_name = 'html', settings_overrides = settings)
-
-    # Permit unpaired asterisk delimiters that docutils finds problematic.
-    asteriskRegEx = '<a href=".*"><span class="problematic" id=".*">\\*</span></a>'
-    return re.sub(asteriskRegEx, '*', html)
+    return _rstRenderer.render(rstText, defaultRole)
+
+@tracing.traced('docToHtml')
+def docToHtml(doc, defaultRole = 'code'):
+    '''
+    Converts a documentation string to an HTML fragment, returning the HTML and the name of the
+    renderer used: 'rst', 'markdown', or 'plain'.
+
+    The documentation string is treated as reStructuredText, unless that leads to an exception or a
+    "problematic" span, in which case it's treated as markdown. If that fails too, it's displayed as
+    preformatted plain text.
+    '''
+    try:
+        html = rstToHtml(doc, defaultRole)
+        if '<span class="problematic"' not in html:
+            return html, 'rst'
+    except:
+        pass
+    try:
+        return markdown(doc), 'markdown'
+    except:
+        return plainTextToHtml(doc), 'plain'
+
+def plainTextToHtml(text):
+    '''Converts plain text to a preformatted HTML fragment.'''
+    return f'<pre>{escape(text)}</pre>'
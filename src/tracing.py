@@ -0,0 +1,144 @@
+'''
+Timing of the stages of pyspector's work, for finding out what makes it slow.
+
+Code marks each stage of interest with a span, using "with tracing.span(name, detail):" or the
+traced(name) decorator. A detail only known once the stage is done can be set within the span, using
+"with tracing.span(name) as span:" and then "span.detail = detail". While tracing is enabled, each span is recorded (with its thread, start time,
+and duration) in a ring buffer holding the most recent spans, which can be exported in the Chrome
+trace event format, for viewing in chrome://tracing or https://ui.perfetto.dev. While it's disabled,
+a span costs little more than a function call.
+
+Tracing is enabled at startup if the PYSPECTOR_TRACE environment variable is set to anything but 0.
+If it's set to a filename ending in .json, the trace is saved to that file when pyspector exits.
+'''
+
+# External imports:
+from collections import deque
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+SpanListener = Callable[[str, str, float], None]
+
+# The maximum number of spans kept; older spans are discarded.
+maxSpanCount = 100000
+
+_environmentValue = os.environ.get('PYSPECTOR_TRACE', '')
+_enabled = _environmentValue not in ('', '0')
+
+# The file to save the trace to on exit, if any.
+exitFilename = _environmentValue if _environmentValue.endswith('.json') else None
+
+# Recorded spans, as (name, detail, thread ID, start time, end time) tuples; the depth of nested
+# spans on each thread; the names of threads that have recorded spans; and functions to call when
+# an outermost span ends.
+_spans = deque(maxlen = maxSpanCount)
+_threadState = threading.local()
+_threadNames = {}
+_listeners = []
+_originTime = time.perf_counter()
+
+class _Span:
+    '''A context manager that records the time spent within it.'''
+
+    __slots__ = ('name', 'detail', 'startTime')
+
+    def __init__(self, name: str, detail: str):
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self) -> '_Span':
+        depth = getattr(_threadState, 'depth', None)
+        if depth is None:
+            depth = 0
+            _threadNames[threading.get_ident()] = threading.current_thread().name
+        _threadState.depth = depth + 1
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, *exceptionInfo) -> None:
+        endTime = time.perf_counter()
+        _spans.append((self.name, self.detail, threading.get_ident(), self.startTime, endTime))
+        _threadState.depth -= 1
+        if _threadState.depth == 0:
+            for listener in _listeners:
+                listener(self.name, self.detail, endTime - self.startTime)
+
+class _NullSpan:
+    '''A context manager that does nothing, used while tracing is disabled.'''
+
+    @property
+    def detail(self) -> str:
+        return ''
+
+    @detail.setter
+    def detail(self, value: str) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exceptionInfo) -> None:
+        pass
+
+_nullSpan = _NullSpan()
+
+def isEnabled() -> bool:
+    '''Returns whether spans are being recorded.'''
+    return _enabled
+
+def setEnabled(value: bool) -> None:
+    '''Starts or stops recording spans. Spans recorded earlier are kept.'''
+    global _enabled
+    _enabled = value
+
+def span(name: str, detail: str = '') -> object:
+    '''Returns a context manager that records the time spent within it as a span with the given name
+    (and optional detail, such as the name of the module or file involved).'''
+    return _Span(name, detail) if _enabled else _nullSpan
+
+def traced(name: str) -> Callable:
+    '''Returns a decorator that records each call of a function as a span with the given name.'''
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(name, ''):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def addListener(listener: SpanListener) -> None:
+    '''Calls a function with the name, detail, and duration (in seconds) of each outermost span when
+    it ends, on the thread that recorded the span.'''
+    _listeners.append(listener)
+
+def removeListener(listener: SpanListener) -> None:
+    '''Stops calling a function added with addListener.'''
+    _listeners.remove(listener)
+
+def clear() -> None:
+    '''Discards all recorded spans.'''
+    _spans.clear()
+
+def getChromeTrace() -> dict:
+    '''Returns the recorded spans as Chrome trace events (with times in microseconds).'''
+    processId = os.getpid()
+    events = [{ 'name': 'thread_name', 'ph': 'M', 'pid': processId, 'tid': threadId,
+        'args': { 'name': threadName } } for threadId, threadName in list(_threadNames.items())]
+    for name, detail, threadId, startTime, endTime in list(_spans):
+        event = { 'name': name, 'cat': 'pyspector', 'ph': 'X', 'pid': processId, 'tid': threadId,
+            'ts': (startTime - _originTime) * 1e6, 'dur': (endTime - startTime) * 1e6 }
+        if detail:
+            event['args'] = { 'detail': detail }
+        events.append(event)
+    return { 'traceEvents': events, 'displayTimeUnit': 'ms' }
+
+def exportChromeTrace(filename: str) -> None:
+    '''Saves the recorded spans to a file in the Chrome trace event format.'''
+    with open(filename, 'w') as file:
+        json.dump(getChromeTrace(), file)
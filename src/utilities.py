@@ -22,6 +22,15 @@ def getItemFromIndex(model: QAbstractProxyModel, index: QModelIndex) -> QStandar
         model = model.sourceModel()
     return model.itemFromIndex(index)
 
+def getIndexPath(index: QModelIndex) -> tuple:
+    '''Returns the rows of an index and its ancestors, starting from the top level, which sort in
+    the order the items are displayed in a tree view.'''
+    rows = []
+    while index.isValid():
+        rows.append(index.row())
+        index = index.parent()
+    return tuple(reversed(rows))
+
 ItemPredicate = Callable[[QStandardItem], bool]
 
 def findIndexInModel(model: QAbstractProxyModel, predicate: ItemPredicate,
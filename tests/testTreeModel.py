@@ -0,0 +1,92 @@
+'''
+Tests of TreeModel, checked with Qt's QAbstractItemModelTester.
+
+Usage: python -m unittest discover tests
+'''
+
+# External imports:
+import contextlib
+import io
+import os
+import sys
+import unittest
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import (qInstallMessageHandler, QEventLoop, QMessageLogContext,
+    QModelIndex, QPersistentModelIndex, QTimer)
+from PyQt5.QtTest import QAbstractItemModelTester
+from PyQt5.QtWidgets import QApplication
+
+# Local imports:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from MainModel import MainModel
+
+app = QApplication.instance() or QApplication([])
+
+class TreeModelTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # Collect the failures reported by model testers, which are reported as warnings.
+        self.warnings = []
+        def handleMessage(messageType: int, context: QMessageLogContext, message: str) -> None:
+            if context.category == 'qt.modeltest':
+                self.warnings.append(message)
+        qInstallMessageHandler(handleMessage)
+
+    def tearDown(self) -> None:
+        qInstallMessageHandler(None)
+
+    def setModuleNames(self, model: MainModel, moduleNames: list) -> None:
+        '''Sets the modules in a model, waiting until they have been loaded.'''
+        eventLoop = QEventLoop()
+        def moduleLoadingFinished(moduleName: str) -> None:
+            if len(model.loadingModuleNames) == 0:
+                eventLoop.quit()
+        model.moduleLoadingFinished.connect(moduleLoadingFinished)
+        with contextlib.redirect_stdout(io.StringIO()):
+            model.setModuleNames(moduleNames)
+            if len(model.loadingModuleNames):
+                QTimer.singleShot(30000, eventLoop.quit)
+                eventLoop.exec_()
+        model.moduleLoadingFinished.disconnect(moduleLoadingFinished)
+
+    def testRemoveNonContiguousModules(self) -> None:
+        model = MainModel()
+        self.setModuleNames(model, ['abc', 'bisect', 'colorsys', 'heapq', 'keyword'])
+        reportingMode = QAbstractItemModelTester.FailureReportingMode.Warning
+        testers = [QAbstractItemModelTester(treeModel, reportingMode)
+            for treeModel in [model._treeModel, model.filteredTreeModel]]
+
+        # Remove the first, middle, and last modules.
+        self.setModuleNames(model, ['bisect', 'heapq'])
+        self.assertEqual([], self.warnings)
+        treeModel = model._treeModel
+        nodes = [treeModel.index(row, 0).internalPointer() for row in range(treeModel.rowCount())]
+        self.assertEqual(['bisect', 'heapq'], [node.name for node in nodes])
+        self.assertEqual([0, 1], [node.row for node in nodes])
+
+    def testToggleSortByType(self) -> None:
+        model = MainModel()
+        self.setModuleNames(model, ['abc', 'colorsys'])
+        reportingMode = QAbstractItemModelTester.FailureReportingMode.Warning
+        testers = [QAbstractItemModelTester(treeModel, reportingMode)
+            for treeModel in [model._treeModel, model.filteredTreeModel]]
+
+        # Keep an index to a nested node, whose siblings are sorted when the order changes, while
+        # the children of other nodes are sorted when they're next accessed.
+        treeModel = model._treeModel
+        nodes = {node.id: node for node in model._itemsById.values()}
+        index = QPersistentModelIndex(treeModel.indexFromItem(nodes['abc/ABC/__init__']))
+        for sortByType in [False, True, False]:
+            treeModel.sortByType = sortByType
+            for node in nodes.values():
+                names = [(not sortByType or child.type, child.name)
+                    for child in treeModel.getChildren(node)]
+                self.assertEqual(sorted(names), names)
+                self.assertEqual(list(range(len(names))),
+                    [child.row for child in treeModel.getChildren(node)])
+            self.assertIs(nodes['abc/ABC/__init__'], treeModel.itemFromIndex(QModelIndex(index)))
+            self.assertEqual(nodes['abc/ABC/__init__'].row, index.row())
+        self.assertEqual([], self.warnings)
+
+if __name__ == '__main__':
+    unittest.main()